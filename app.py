@@ -6,23 +6,28 @@ from pathlib import Path
 APP_DIR = Path(__file__).parent.resolve()
 os.chdir(APP_DIR)
 
-# Define pages using relative paths (works now that cwd is set correctly)
-upload = st.Page("pages/Upload_Invoices.py", icon='💼')
+# Page objects never change at runtime, so build them once per process
+@st.cache_resource
+def _build_pages():
+    # Define pages using relative paths (works now that cwd is set correctly)
+    upload = st.Page("pages/Upload_Invoices.py", icon='💼')
 
-view_invoices = st.Page("pages/View_Invoices.py", icon='🎓') 
+    view_invoices = st.Page("pages/View_Invoices.py", icon='🎓') 
 
-view_price_variations = st.Page("pages/View_Price_Variations.py", icon='📋') # For analysis report
-database_controls = st.Page("pages/Database_Controls.py", icon='🧪') # Demo analysis report
-dashboard = st.Page("pages/Dashboard.py", icon='📋')
+    view_price_variations = st.Page("pages/View_Price_Variations.py", icon='📋') # For analysis report
+    database_controls = st.Page("pages/Database_Controls.py", icon='🧪') # Demo analysis report
+    dashboard = st.Page("pages/Dashboard.py", icon='📋')
 
+    # Group pages
+    return {
+        "Upload": [upload],
+        "Analysis": [view_invoices, view_price_variations, dashboard], # Grouped analysis report
+        "DB": [database_controls], 
+    }
 
-# Group pages
-pg = st.navigation({
-    "Upload": [upload],
-    "Analysis": [view_invoices, view_price_variations, dashboard], # Grouped analysis report
-    "DB": [database_controls], 
 
-})
+# st.navigation registers the pages for the current run, so it is called on every rerun
+pg = st.navigation(_build_pages())
 
 # Run the navigation
 pg.run()
\ No newline at end of file
@@ -1,65 +1,222 @@
-import shutil
+import os
+import json
+import queue
+import logging
+import logging.handlers
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Tuple
 
-from src import process_files_to_processed_folder, start_connection, process_invoice, get_structured_data_from_text, save_inv_li_to_db
+import pandas as pd
 
+from src import (
+    process_files_to_processed_folder,
+    start_connection,
+    process_invoice,
+    get_structured_data_from_text,
+    save_inv_li_batch,
+    file_sha256,
+    make_extraction_key,
+    get_cached_extraction,
+    put_cached_extraction,
+)
 
-DATA_DIR = Path("data") / "my_files"
-STAGING_DIR = Path("data") / "staging_area"
-PROCESSED_DIR = Path("data") / "processed_area"
-
-def reset_staging():
-    """Delete staging_area if it exists, then recreate empty."""
-    if STAGING_DIR.exists():
-        shutil.rmtree(STAGING_DIR)
-    STAGING_DIR.mkdir(parents=True, exist_ok=True)
+logger = logging.getLogger("invoice_pipeline")
 
 
-def copy_all_to_staging():
-    """Copy all files in DATA_DIR (including all sub-folders) into staging_area."""
-    for file_path in DATA_DIR.rglob("*"):
-        if file_path.is_file():
-            dest = STAGING_DIR / file_path.name
-
-            # handle name collision
-            if dest.exists():
-                dest = STAGING_DIR / f"{file_path.stem}_dup{file_path.suffix}"
+DATA_DIR = Path("data") / "my_files"
 
-            shutil.copy2(file_path, dest)
+# Number of invoices extracted concurrently. Extraction is dominated by
+# OCR / Gemini round-trips, so threads are enough (and the OCR model is
+# loaded once per process, which rules out a process pool on 8GB boxes).
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "4"))
+
+# Extracted invoices are written to MongoDB in batches of this many, using
+# one insert_many per collection instead of two round-trips per invoice.
+BATCH_SIZE = int(os.getenv("PIPELINE_BATCH_SIZE", "100"))
+
+# Input files already taken through the whole pipeline, keyed by
+# _source_key (SHA-256 of the file contents). Bump PIPELINE_VERSION to force every file to be re-run.
+MANIFEST_PATH = Path("data") / "manifest.json"
+PIPELINE_VERSION = "1"
+
+
+def _setup_logging():
+    """
+    Route pipeline logs through a queue so worker threads only enqueue records;
+    a single listener thread formats and writes them to stderr.
+
+    Returns the started QueueListener (stop it to flush on exit).
+    """
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
+    listener = logging.handlers.QueueListener(log_queue, handler)
+
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    # e.g. PIPELINE_LOG_LEVEL=WARNING to drop the per-file INFO lines
+    logger.setLevel(os.getenv("PIPELINE_LOG_LEVEL", "INFO").upper())
+    logger.propagate = False
+
+    listener.start()
+    return listener
+
+
+def _load_manifest():
+    """Return the {source key: pipeline version} manifest, or {} if absent/unreadable."""
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Ignoring unreadable manifest {MANIFEST_PATH}: {e}")
+        return {}
+
+
+def _save_manifest(manifest):
+    """Atomically write the manifest back to MANIFEST_PATH."""
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = MANIFEST_PATH.with_name(f".tmp-{MANIFEST_PATH.name}")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, MANIFEST_PATH)
+
+
+def _source_key(entry):
+    """Content key for an input file, so renames, copies and touches don't force a re-run."""
+    return file_sha256(entry.path)
+
+
+def _extract_one(file_path: Path, temp_restaurant_id) -> Optional[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Extract text from a single processed file and build its invoice/line item
+    DataFrames. Runs inside a worker thread; does NOT write the invoice itself.
+
+    Returns:
+        (inv_df, li_df), or None if no text could be extracted.
+    """
+    logger.info(f"Processing {file_path}...")
+
+    extraction = process_invoice(file_path)
+    if extraction is None:
+        logger.warning(f"No text extracted from {file_path}, skipping.")
+        return None
+
+    extracted_text, filename, text_length, page_count, extraction_timestamp = extraction
+
+    # Reuse a previous structured extraction of identical text (skips the LLM)
+    cache_key = make_extraction_key(extracted_text)
+    cached = get_cached_extraction(
+                                cache_key,
+                                filename=filename,
+                                restaurant_id=temp_restaurant_id,
+                                text_length=text_length,
+                                page_count=page_count,
+                                extraction_timestamp=extraction_timestamp)
+    if cached is not None:
+        logger.info(f"Extraction cache hit for {file_path}")
+        return cached
+
+    inv_df, li_df = get_structured_data_from_text(
+                                    extracted_text=extracted_text, 
+                                    filename=filename, 
+                                    text_length=text_length, 
+                                    page_count=page_count, 
+                                    extraction_timestamp=extraction_timestamp,
+                                    restaurant_id=temp_restaurant_id,
+                                    file_path=str(file_path))
+
+    put_cached_extraction(cache_key, inv_df, li_df)
+    return inv_df, li_df
 
 
 def run_pipeline():
-    # Reset staging before run
-    reset_staging()
+    manifest = _load_manifest()
+    source_keys = {}
 
-    # 1st loop: copy everything to staging
-    copy_all_to_staging()
+    def already_done(entry):
+        key = _source_key(entry)
+        source_keys[Path(entry.path)] = key
+        return manifest.get(key) == PIPELINE_VERSION
 
-    # regularize files and saves to PROCESSED_DIR
-    process_files_to_processed_folder()
+    # regularize new/changed files from DATA_DIR straight into PROCESSED_DIR
+    processed = process_files_to_processed_folder(DATA_DIR, skip=already_done)
+    processed_files = [p for outputs in processed.values() for p in outputs]
+
+    # A source file is recorded in the manifest once all of its outputs
+    # have been extracted and saved.
+    source_of = {p: src for src, outputs in processed.items() for p in outputs}
+    remaining = {src: len(outputs) for src, outputs in processed.items()}
+    failed_sources = set()
 
     # checks if db exists, if not creates it
     temp_restaurant_id = start_connection(create_dummy=True)
 
-    # 2nd loop: process files from staging
-    for file_path in PROCESSED_DIR.iterdir():
-        print(f"Processing {file_path}...")
-
-        extracted_text, filename, text_length, page_count, extraction_timestamp = process_invoice(file_path)
-        inv_df, li_df = get_structured_data_from_text(
-                                            extracted_text=extracted_text, 
-                                            filename=filename, 
-                                            text_length=text_length, 
-                                            page_count=page_count, 
-                                            extraction_timestamp=extraction_timestamp,
-                                            restaurant_id=temp_restaurant_id)
-        save_inv_li_to_db(inv_df, li_df)
-
-        print(f"Done! file: {file_path}")
-
-    # Clean staging after run
-    reset_staging()
+    inv_batch = []
+    li_batch = []
+    batch_sources = []
+
+    def flush_batch():
+        if not inv_batch:
+            return
+        result = save_inv_li_batch(inv_batch, li_batch)
+        logger.info(result["message"])
+
+        # An invoice already in the DB (duplicate key) counts as done; any other
+        # rejection, or missing line items, keeps its source out of the manifest
+        # so it is retried on the next run.
+        errors = result.get("errors", {})
+        duplicates = set(result.get("duplicates", []))
+        line_items_failed = set(result.get("line_items_failed", []))
+        for pos, src in enumerate(batch_sources):
+            if (pos in errors and pos not in duplicates) or pos in line_items_failed:
+                failed_sources.add(src)
+            remaining[src] -= 1
+            if remaining[src] == 0 and src not in failed_sources:
+                manifest[source_keys[src]] = PIPELINE_VERSION
+
+        inv_batch.clear()
+        li_batch.clear()
+        batch_sources.clear()
+
+    # extract files concurrently, save in batches on this thread
+    with ThreadPoolExecutor(max_workers=PIPELINE_WORKERS) as ex:
+        futures = {
+            ex.submit(_extract_one, file_path, temp_restaurant_id): file_path
+            for file_path in processed_files
+        }
+
+        for fut in as_completed(futures):
+            file_path = futures[fut]
+            try:
+                result = fut.result()
+            except Exception as e:
+                logger.error(f"Extraction failed for {file_path}: {e}")
+                failed_sources.add(source_of[file_path])
+                continue
+
+            if result is None:
+                failed_sources.add(source_of[file_path])
+                continue
+
+            inv_df, li_df = result
+            inv_batch.append(inv_df)
+            li_batch.append(li_df)
+            batch_sources.append(source_of[file_path])
+
+            logger.info(f"Done! file: {file_path}")
+
+            if len(inv_batch) >= BATCH_SIZE:
+                flush_batch()
+
+    flush_batch()
+    _save_manifest(manifest)
 
 
 if __name__ == "__main__":
-    run_pipeline()
+    listener = _setup_logging()
+    try:
+        run_pipeline()
+    finally:
+        listener.stop()
@@ -16,11 +16,14 @@ from bson import ObjectId
 from src.storage.database import (
     get_all_restaurants,
     get_all_vendors,
+    get_all_category_names,
+    get_line_item_categories,
     get_invoice_line_items_joined,
     get_sales_data,
     get_spending_by_period,
     get_category_breakdown,
     get_vendor_spending,
+    get_invoice_counts_by_weekday,
     get_top_items_by_spend,
     get_price_variations,
     get_recent_invoices
@@ -36,6 +39,8 @@ st.set_page_config(
 
 # ---------- DATA LOADING FROM DATABASE ----------
 
+CATEGORICAL_COLUMNS = ("category", "vendor", "location", "item_name", "unit")
+
 @st.cache_data(ttl=300)  # Cache for 5 minutes
 def load_filter_options():
     """Load available restaurants and vendors for filters."""
@@ -53,51 +58,133 @@ def load_filter_options():
             v['name']: str(v['_id']) 
             for v in vendors
         }
+        # Union with stored item categories so "Uncategorized" and any legacy
+        # category stay selectable and are not dropped by a narrowed filter
+        categories = sorted(set(get_all_category_names()) | set(get_line_item_categories()))
         
-        return restaurant_options, vendor_options
+        return restaurant_options, vendor_options, categories
     except Exception as e:
         st.error(f"Failed to load filter options: {e}")
-        return {}, {}
+        return {}, {}, []
+
+
+@st.cache_data(ttl=300, show_spinner=False)  # Cache for 5 minutes per filter tuple
+def _query_data(start_date, end_date, restaurant_ids, vendor_ids, categories):
+    """Run the invoice and sales queries. Raises on failure so errors are not cached."""
+    # Stored IDs are ObjectIds; strings would match nothing and skip the indexes
+    restaurant_oids = [ObjectId(rid) for rid in restaurant_ids] if restaurant_ids else None
+    vendor_oids = [ObjectId(vid) for vid in vendor_ids] if vendor_ids else None
+    
+    # Load invoice data with line items
+    invoices_df = get_invoice_line_items_joined(
+        start_date=start_date,
+        end_date=end_date,
+        restaurant_ids=restaurant_oids,
+        vendor_ids=vendor_oids,
+        categories=list(categories) if categories else None
+    )
+    # Low-cardinality labels repeated on every line item: categorical codes are
+    # far smaller and group faster (groupbys below use observed=True)
+    invoices_df = invoices_df.astype({c: "category" for c in CATEGORICAL_COLUMNS})
+    # Per-row prices/quantities only feed means and ratios, so float32 is plenty.
+    # line_total stays float64: its sums are the dollar KPIs and float32 would
+    # start dropping cents above ~$160k.
+    for col in ("unit_price", "quantity"):
+        invoices_df[col] = pd.to_numeric(invoices_df[col], downcast="float")
+    
+    # Load sales data
+    sales_df = get_sales_data(
+        start_date=start_date,
+        end_date=end_date,
+        restaurant_ids=restaurant_oids
+    )
+    if "covers" in sales_df.columns:
+        sales_df["covers"] = pd.to_numeric(sales_df["covers"], downcast="integer")
+    
+    return invoices_df, sales_df
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _query_rollups(start_date, end_date, restaurant_ids, vendor_ids, categories):
+    """Run the server-side top-items and vendor-spend aggregations."""
+    restaurant_oids = [ObjectId(rid) for rid in restaurant_ids] if restaurant_ids else None
+    vendor_oids = [ObjectId(vid) for vid in vendor_ids] if vendor_ids else None
+    categories = list(categories) if categories else None
+    
+    top_items = get_top_items_by_spend(
+        start_date=start_date,
+        end_date=end_date,
+        restaurant_ids=restaurant_oids,
+        limit=15,
+        categories=categories,
+        vendor_ids=vendor_oids
+    )
+    vendor_spend = get_vendor_spending(
+        start_date=start_date,
+        end_date=end_date,
+        restaurant_ids=restaurant_oids,
+        vendor_ids=vendor_oids,
+        categories=categories
+    )
+    return top_items, vendor_spend
 
 
-def load_data_from_db(start_date, end_date, restaurant_ids=None, vendor_ids=None):
+def load_rollups_from_db(start_date, end_date, restaurant_ids=None, vendor_ids=None, categories=None):
+    """
+    Load the top 15 items and per-vendor spend, aggregated in MongoDB so only
+    the small result sets are transferred.
+    
+    Returns:
+        top_items (item_name, line_total), vendor_spend (vendor, line_total)
+    """
+    try:
+        top_items, vendor_spend = _query_rollups(
+            start_date,
+            end_date,
+            tuple(restaurant_ids) if restaurant_ids else None,
+            tuple(vendor_ids) if vendor_ids else None,
+            tuple(categories) if categories else None
+        )
+    except Exception as e:
+        print("Failed to load aggregates from database:")
+        traceback.print_exc()
+        st.error(f"Failed to load aggregates from database: {e}")
+        top_items = pd.DataFrame(columns=["item_name", "total_spend"])
+        vendor_spend = pd.DataFrame(columns=["vendor", "total_spend"])
+    
+    # Charts below are written against line_total
+    top_items = top_items[["item_name", "total_spend"]].rename(columns={"total_spend": "line_total"})
+    vendor_spend = vendor_spend[["vendor", "total_spend"]].rename(columns={"total_spend": "line_total"})
+    return top_items, vendor_spend
+
+
+def load_data_from_db(start_date, end_date, restaurant_ids=None, vendor_ids=None, categories=None):
     """
     Load invoice and sales data from MongoDB for the specified filters.
     
+    Results are cached per filter combination, so widget changes that do not
+    affect the query (budget, thresholds, tabs) reuse the loaded frames.
+    
     Args:
         start_date: Start date (datetime)
         end_date: End date (datetime)
         restaurant_ids: List of ObjectId strings or None
         vendor_ids: List of ObjectId strings or None
+        categories: List of line item categories or None (all)
     
     Returns:
         invoices_df, sales_df (pandas DataFrames)
     """
     try:
-        # Convert string IDs to ObjectId
-        # restaurant_oids = [ObjectId(rid) for rid in restaurant_ids] if restaurant_ids else None
-        # vendor_oids = [ObjectId(vid) for vid in vendor_ids] if vendor_ids else None
-        
-        restaurant_oids = restaurant_ids  # keep as strings for debugging
-        vendor_oids = vendor_ids  # keep as strings for debugging
-        
-        # Load invoice data with line items
-        invoices_df = get_invoice_line_items_joined(
-            start_date=start_date,
-            end_date=end_date,
-            restaurant_ids=restaurant_oids,
-            vendor_ids=vendor_oids
+        # Tuples keep the cache key hashable and order-stable
+        return _query_data(
+            start_date,
+            end_date,
+            tuple(restaurant_ids) if restaurant_ids else None,
+            tuple(vendor_ids) if vendor_ids else None,
+            tuple(categories) if categories else None
         )
         
-        # Load sales data
-        sales_df = get_sales_data(
-            start_date=start_date,
-            end_date=end_date,
-            restaurant_ids=restaurant_oids
-        )
-        
-        return invoices_df, sales_df
-        
     except Exception as e:
         print("Failed to load data from database:")
         traceback.print_exc()  # full traceback with file & line numbers
@@ -115,34 +202,155 @@ def load_data_from_db(start_date, end_date, restaurant_ids=None, vendor_ids=None
 
 # ---------- HELPER FUNCTIONS ----------
 
+WEEKDAY_NAMES = np.array(["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"], dtype=object)
+
 
+@st.cache_data(ttl=300, show_spinner=False)
 def compute_weekly_spend(df: pd.DataFrame):
+    """Total spend per week; expects the `week` column from add_date_buckets."""
     if df.empty:
         return pd.DataFrame(columns=["week", "total_spend"])
+    # groupby on the pre-bucketed column: no DatetimeIndex rebuild or empty-bin filling
     weekly = (
-        df.set_index("invoice_date")
-        .resample("W")["line_total"]
+        df.groupby("week", sort=True)["line_total"]
         .sum()
         .reset_index()
     )
-    weekly.rename(columns={"invoice_date": "week", "line_total": "total_spend"}, inplace=True)
+    weekly.rename(columns={"line_total": "total_spend"}, inplace=True)
     return weekly
 
 
+@st.cache_data(ttl=300, show_spinner=False)
 def compute_monthly_spend(df: pd.DataFrame):
+    """Total spend per month; expects the `month` column from add_date_buckets."""
     if df.empty:
         return pd.DataFrame(columns=["month", "total_spend"])
     monthly = (
-        df.set_index("invoice_date")
-        .resample("M")["line_total"]
+        df.groupby("month", sort=True)["line_total"]
         .sum()
         .reset_index()
     )
-    monthly["month"] = monthly["invoice_date"].dt.to_period("M").dt.to_timestamp()
-    monthly = monthly[["month", "total_spend"]]
+    monthly.rename(columns={"line_total": "total_spend"}, inplace=True)
     return monthly
 
 
+@st.cache_data(ttl=300, show_spinner=False)
+def compute_category_spend(df: pd.DataFrame):
+    """Total spend per category, largest first."""
+    return (
+        df.groupby("category", observed=True)["line_total"]
+        .sum()
+        .reset_index()
+        .sort_values("line_total", ascending=False)
+    )
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def compute_cat_mix(df: pd.DataFrame):
+    """Spend per (month, category) with each category's share of its month."""
+    cat_mix = (
+        df.groupby(["month", "category"], observed=True)["line_total"]
+        .sum()
+        .reset_index()
+    )
+    if not cat_mix.empty:
+        total_per_month = cat_mix.groupby("month")["line_total"].transform("sum")
+        cat_mix["share"] = cat_mix["line_total"] / total_per_month * 100
+    return cat_mix
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _query_weekday_counts(start_date, end_date, restaurant_ids, vendor_ids, categories):
+    """Run the server-side invoices-per-weekday aggregation."""
+    return get_invoice_counts_by_weekday(
+        start_date=start_date,
+        end_date=end_date,
+        restaurant_ids=[ObjectId(rid) for rid in restaurant_ids] if restaurant_ids else None,
+        vendor_ids=[ObjectId(vid) for vid in vendor_ids] if vendor_ids else None,
+        categories=list(categories) if categories else None
+    )
+
+
+def load_weekday_counts(start_date, end_date, restaurant_ids=None, vendor_ids=None, categories=None):
+    """
+    Number of invoices per weekday, Monday first, counted in MongoDB from the
+    invoice headers so the line items are not needed.
+    
+    Returns:
+        DataFrame with columns: weekday (ordered categorical), invoice_id (count)
+    """
+    try:
+        counts = _query_weekday_counts(
+            start_date,
+            end_date,
+            tuple(restaurant_ids) if restaurant_ids else None,
+            tuple(vendor_ids) if vendor_ids else None,
+            tuple(categories) if categories else None
+        )
+    except Exception as e:
+        print("Failed to load weekday counts from database:")
+        traceback.print_exc()
+        st.error(f"Failed to load weekday counts from database: {e}")
+        counts = pd.DataFrame(columns=["weekday", "invoice_count"])
+    
+    # $dayOfWeek is 1 = Sunday .. 7 = Saturday; WEEKDAY_NAMES starts on Monday
+    day_numbers = counts["weekday"].to_numpy(dtype="int64")
+    inv_count = pd.DataFrame({
+        "weekday": pd.Categorical(WEEKDAY_NAMES[(day_numbers + 5) % 7], categories=list(WEEKDAY_NAMES), ordered=True),
+        "invoice_id": counts["invoice_count"].to_numpy(dtype="int64"),
+    })
+    # Preserve natural weekday ordering
+    return inv_count.sort_values("weekday")
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def compute_invoice_totals(df: pd.DataFrame):
+    """One row per invoice with its total, used by the Vendors and Operations views."""
+    # dropna=False keeps invoices whose vendor/location name is missing
+    return (
+        df.groupby(["invoice_id", "invoice_date", "vendor", "location"], sort=False, dropna=False, observed=True)["line_total"]
+        .sum()
+        .reset_index()
+    )
+
+
+def to_days(dates) -> np.ndarray:
+    """Truncate dates to numpy day resolution (the page never needs finer)."""
+    return np.asarray(dates, dtype="datetime64[ns]").astype("datetime64[D]")
+
+
+def add_date_buckets(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add month / week columns derived from invoice_date in one place,
+    so the charts below don't each re-derive them.
+    """
+    if df.empty:
+        return df.assign(
+            month=pd.Series(dtype="datetime64[ns]"),
+            week=pd.Series(dtype="datetime64[ns]"),
+        )
+    days = to_days(df["invoice_date"])
+    # Day 0 (1970-01-01) was a Thursday, so Monday-based weekday = (day + 3) % 7
+    weekday_idx = (days.view("int64") + 3) % 7
+    return df.assign(
+        # numpy truncation to the month start (vectorized, no Period objects)
+        month=days.astype("datetime64[M]").astype("datetime64[ns]"),
+        # Week-ending Sunday, the same label resample("W") uses
+        week=(days + (6 - weekday_idx)).astype("datetime64[ns]"),
+    )
+
+
+def window_spend(days_sorted, spend_cumsum, start, end):
+    """
+    Spend and row count for invoices dated start..end (whole days, inclusive),
+    given day-resolution dates sorted ascending and the matching running total
+    of line_total (with a leading 0).
+    """
+    lo = np.searchsorted(days_sorted, to_days([start])[0], side="left")
+    hi = np.searchsorted(days_sorted, to_days([end])[0], side="right")
+    return spend_cumsum[hi] - spend_cumsum[lo], hi - lo
+
+
 def safe_metric(value, fmt="{:,.0f}", default="N/A"):
     if value is None or (isinstance(value, (int, float)) and np.isnan(value)):
         return default
@@ -157,7 +365,7 @@ def safe_metric(value, fmt="{:,.0f}", default="N/A"):
 st.sidebar.title("Filters")
 
 # Load filter options from database
-restaurant_options, vendor_options = load_filter_options()
+restaurant_options, vendor_options, category_options = load_filter_options()
 
 # Date range: Use a wide default range to show all data
 today = datetime.today().date()
@@ -204,6 +412,13 @@ vendors_selected_names = st.sidebar.multiselect(
 # Convert selected vendor names to IDs for database query
 vendors_selected_ids = [vendor_options[v] for v in vendors_selected_names] if vendors_selected_names else None
 
+# Category filter (applied by the database query)
+categories_selected = st.sidebar.multiselect(
+    "Categories",
+    options=category_options,
+    default=category_options,
+)
+
 # Refresh button
 if st.sidebar.button("🔄 Refresh Data", use_container_width=True):
     st.cache_data.clear()
@@ -232,16 +447,27 @@ price_alert_threshold = st.sidebar.slider(
 # ---------- LOAD DATA FROM DATABASE ----------
 
 with st.spinner("Loading data from database..."):
+    # Only filter when narrowed, so items in unlisted categories still show
+    category_filter = categories_selected if len(categories_selected) < len(category_options) else None
     invoices_df, sales_df = load_data_from_db(
         start_datetime,
         end_datetime,
         locations_selected_ids,
-        vendors_selected_ids
+        vendors_selected_ids,
+        category_filter
+    )
+    top_items, vendor_spend = load_rollups_from_db(
+        start_datetime,
+        end_datetime,
+        locations_selected_ids,
+        vendors_selected_ids,
+        category_filter
     )
 
-# Use loaded data directly (already filtered by database query)
-filtered_invoices = invoices_df.copy()
-filtered_sales = sales_df.copy()
+# Use loaded data directly (already filtered by database query). Everything
+# below only reads these frames, so no defensive copy is needed.
+filtered_invoices = add_date_buckets(invoices_df)
+filtered_sales = sales_df
 
 # Show data loading info in sidebar
 st.sidebar.markdown("---")
@@ -249,21 +475,18 @@ st.sidebar.caption(f"📊 Data loaded: {len(invoices_df)} invoice line items")
 if not sales_df.empty:
     st.sidebar.caption(f"💰 Sales records: {len(sales_df)}")
 
-# Category filter (client-side since it's for UI only)
-if not filtered_invoices.empty:
-    categories = sorted(filtered_invoices["category"].unique())
-    categories_selected = st.sidebar.multiselect(
-        "Categories",
-        options=categories,
-        default=categories,
-    )
-    
-    if categories_selected and len(categories_selected) < len(categories):
-        filtered_invoices = filtered_invoices[filtered_invoices["category"].isin(categories_selected)]
-else:
+if filtered_invoices.empty:
     st.sidebar.warning("⚠️ No invoice data available for selected filters")
     st.sidebar.info("💡 Tip: Try adjusting your date range or location filters")
 
+# Item choices for the Vendors and Planning pickers. item_name is categorical
+# and its categories are exactly the loaded values, so no O(N) unique() scan.
+item_options = (
+    filtered_invoices["item_name"].cat.categories.sort_values().tolist()
+    if not filtered_invoices.empty
+    else []
+)
+
 # Some derived aggregates for KPIs
 period_days = max(1, (pd.to_datetime(end_date) - pd.to_datetime(start_date)).days + 1)
 
@@ -273,23 +496,23 @@ if not sales_df.empty and pd.notna(sales_df["date"].max()):
 else:
     today = end_date
 
+# Sort dates once; every date-window total below is then two binary searches
+# over a running sum instead of a boolean mask over the whole frame
+_days = to_days(filtered_invoices["invoice_date"])
+_order = np.argsort(_days, kind="stable")
+days_sorted = _days[_order]
+spend_cumsum = np.concatenate(
+    ([0.0], np.nancumsum(filtered_invoices["line_total"].to_numpy(dtype="float64")[_order]))
+)
+
 # Last 7 days / previous 7 days
 period_end = pd.to_datetime(end_date)
 last7_start = period_end - timedelta(days=6)
 prev7_start = last7_start - timedelta(days=7)
 prev7_end = last7_start - timedelta(days=1)
 
-last7_inv = filtered_invoices[
-    (filtered_invoices["invoice_date"] >= last7_start)
-    & (filtered_invoices["invoice_date"] <= period_end)
-]
-prev7_inv = filtered_invoices[
-    (filtered_invoices["invoice_date"] >= prev7_start)
-    & (filtered_invoices["invoice_date"] <= prev7_end)
-]
-
-last7_spend = last7_inv["line_total"].sum()
-prev7_spend = prev7_inv["line_total"].sum()
+last7_spend, _ = window_spend(days_sorted, spend_cumsum, last7_start, period_end)
+prev7_spend, _ = window_spend(days_sorted, spend_cumsum, prev7_start, prev7_end)
 
 # Monthly spend current vs previous month (based on filtered range end)
 end_month = period_end.to_period("M")
@@ -298,17 +521,8 @@ prev_month = (end_month - 1).to_timestamp()
 prev_month_end = current_month_start - pd.Timedelta(days=1)
 prev_month_start = prev_month
 
-current_month_inv = filtered_invoices[
-    (filtered_invoices["invoice_date"] >= current_month_start)
-    & (filtered_invoices["invoice_date"] <= period_end)
-]
-prev_month_inv = filtered_invoices[
-    (filtered_invoices["invoice_date"] >= prev_month_start)
-    & (filtered_invoices["invoice_date"] <= prev_month_end)
-]
-
-current_month_spend = current_month_inv["line_total"].sum()
-prev_month_spend = prev_month_inv["line_total"].sum()
+current_month_spend, current_month_rows = window_spend(days_sorted, spend_cumsum, current_month_start, period_end)
+prev_month_spend, _ = window_spend(days_sorted, spend_cumsum, prev_month_start, prev_month_end)
 
 # Revenue & covers for cost % / cost per cover
 total_purchases = filtered_invoices["line_total"].sum()
@@ -323,14 +537,20 @@ cost_per_cover = (total_purchases / total_covers) if total_covers and total_cove
 
 st.title("🍽️ Restaurant Cost & Purchasing Dashboard")
 
-tab_overview, tab_vendors, tab_planning, tab_ops = st.tabs(
-    ["Overview", "Vendors", "Planning & Seasonality", "Operations"]
+# st.tabs runs every tab body on each rerun; a radio lets only the selected
+# view compute its aggregations and charts
+active_tab = st.radio(
+    "View",
+    ["Overview", "Vendors", "Planning & Seasonality", "Operations"],
+    horizontal=True,
+    label_visibility="collapsed",
+    key="active_tab",
 )
 
 
 # ---------- TAB 1: OVERVIEW ----------
 
-with tab_overview:
+if active_tab == "Overview":
     st.subheader("Key KPIs")
 
     col1, col2, col3, col4 = st.columns(4)
@@ -408,12 +628,7 @@ with tab_overview:
         if filtered_invoices.empty:
             st.write("No data.")
         else:
-            cat_df = (
-                filtered_invoices.groupby("category")["line_total"]
-                .sum()
-                .reset_index()
-                .sort_values("line_total", ascending=False)
-            )
+            cat_df = compute_category_spend(filtered_invoices)
             cat_chart = (
                 alt.Chart(cat_df)
                 .mark_arc(innerRadius=50)
@@ -425,21 +640,15 @@ with tab_overview:
                 .properties(height=280)
             )
             st.altair_chart(cat_chart, use_container_width=True)
-            st.dataframe(cat_df.rename(columns={"line_total": "Total Spend"}))
+            # cat_df is sorted largest first; only ship the top rows to the browser
+            st.dataframe(cat_df.head(20).rename(columns={"line_total": "Total Spend"}))
 
     # Top cost drivers
     with c2:
         st.caption("Top Cost Drivers (Items by Spend)")
-        if filtered_invoices.empty:
+        if top_items.empty:
             st.write("No data.")
         else:
-            top_items = (
-                filtered_invoices.groupby("item_name")["line_total"]
-                .sum()
-                .reset_index()
-                .sort_values("line_total", ascending=False)
-                .head(15)
-            )
             bar_chart = (
                 alt.Chart(top_items)
                 .mark_bar()
@@ -463,19 +672,23 @@ with tab_overview:
             st.write("No data.")
         else:
             price_df = (
-                filtered_invoices.assign(month=lambda d: d["invoice_date"].dt.to_period("M").dt.to_timestamp())
-                .groupby(["item_name", "month"])["unit_price"]
+                filtered_invoices.groupby(["item_name", "month"], observed=True)["unit_price"]
                 .mean()
                 .reset_index()
             )
-            # Compute month-over-month change per item with explicit alignment to avoid length mismatch
-            price_df.sort_values(["item_name", "month"], inplace=True)
-            price_df["prev_price"] = price_df.groupby("item_name")["unit_price"].shift(1)
-            price_df["pct_change"] = np.where(
-                price_df["prev_price"] > 0,
-                (price_df["unit_price"] - price_df["prev_price"]) / price_df["prev_price"] * 100,
-                np.nan,
-            )
+            # Compute month-over-month change per item: after sorting, the previous
+            # price is the previous row unless that row belongs to another item
+            price_df.sort_values(["item_name", "month"], kind="mergesort", inplace=True)
+            prices = price_df["unit_price"].to_numpy(dtype="float64")
+            items = price_df["item_name"].to_numpy()
+            prev = np.roll(prices, 1)
+            same_item = items == np.roll(items, 1)
+            if len(same_item):
+                same_item[0] = False  # np.roll wraps the last row around
+            prev[~same_item] = np.nan
+            price_df["prev_price"] = prev
+            with np.errstate(divide="ignore", invalid="ignore"):
+                price_df["pct_change"] = np.where(prev > 0, (prices - prev) / prev * 100, np.nan)
 
             alerts = price_df.loc[
                 price_df["pct_change"].abs() >= price_alert_threshold
@@ -507,7 +720,7 @@ with tab_overview:
             st.write("No data.")
         else:
             grp = (
-                filtered_invoices.groupby(["item_name", "vendor"])
+                filtered_invoices.groupby(["item_name", "vendor"], observed=True)
                 .agg(
                     avg_price=("unit_price", "mean"),
                     total_qty=("quantity", "sum"),
@@ -515,38 +728,32 @@ with tab_overview:
                 .reset_index()
             )
 
-            savings_rows = []
-            for item, sub in grp.groupby("item_name"):
-                sub_sorted = sub.sort_values("avg_price")
-                if len(sub_sorted) < 2:
-                    continue
-                best_vendor_row = sub_sorted.iloc[0]
-                best_price = best_vendor_row["avg_price"]
-                best_vendor = best_vendor_row["vendor"]
-
-                # For all other vendors, estimate savings if they switched
-                for _, row in sub_sorted.iloc[1:].iterrows():
-                    price_diff = row["avg_price"] - best_price
-                    if price_diff <= 0:
-                        continue
-                    potential_savings = price_diff * row["total_qty"]
-                    savings_rows.append(
-                        {
-                            "Item": item,
-                            "Current Vendor": row["vendor"],
-                            "Current Avg Price": row["avg_price"],
-                            "Best Vendor": best_vendor,
-                            "Best Avg Price": best_price,
-                            "Potential Savings": potential_savings,
-                        }
-                    )
+            # Cheapest vendor per item, then compare every other vendor against it
+            best = (
+                grp.sort_values("avg_price", kind="stable")
+                .drop_duplicates("item_name")
+                .rename(columns={"vendor": "Best Vendor", "avg_price": "Best Avg Price"})
+                [["item_name", "Best Vendor", "Best Avg Price"]]
+            )
+            savings_df = grp.merge(best, on="item_name")
+            savings_df = savings_df[savings_df["avg_price"] > savings_df["Best Avg Price"]]
 
-            if not savings_rows:
+            if savings_df.empty:
                 st.info("No clear savings opportunities found for the selected filters.")
             else:
-                savings_df = pd.DataFrame(savings_rows)
-                savings_df.sort_values("Potential Savings", ascending=False, inplace=True)
-                st.dataframe(savings_df.head(15))
+                savings_df = savings_df.assign(
+                    potential_savings=(savings_df["avg_price"] - savings_df["Best Avg Price"]) * savings_df["total_qty"]
+                ).rename(columns={
+                    "item_name": "Item",
+                    "vendor": "Current Vendor",
+                    "avg_price": "Current Avg Price",
+                    "potential_savings": "Potential Savings",
+                })
+                savings_df = savings_df[[
+                    "Item", "Current Vendor", "Current Avg Price",
+                    "Best Vendor", "Best Avg Price", "Potential Savings",
+                ]]
+                st.dataframe(savings_df.nlargest(15, "Potential Savings"))
 
     st.markdown("---")
 
@@ -577,19 +784,12 @@ with tab_overview:
 
 # ---------- TAB 2: VENDORS ----------
 
-with tab_vendors:
+if active_tab == "Vendors":
     st.subheader("Vendor Overview")
 
     if filtered_invoices.empty:
         st.info("No invoice data for selected filters.")
     else:
-        vendor_spend = (
-            filtered_invoices.groupby("vendor")["line_total"]
-            .sum()
-            .reset_index()
-            .sort_values("line_total", ascending=False)
-        )
-
         col1, col2 = st.columns([2, 1])
 
         with col1:
@@ -609,9 +809,7 @@ with tab_vendors:
         with col2:
             st.caption("Vendor Stats (Selected Period)")
             n_active_vendors = vendor_spend["vendor"].nunique()
-            avg_invoice_amount = (
-                filtered_invoices.groupby("invoice_id")["line_total"].sum().mean()
-            )
+            avg_invoice_amount = compute_invoice_totals(filtered_invoices)["line_total"].mean()
             st.metric("Active Vendors", n_active_vendors)
             st.metric("Average Invoice Amount", safe_metric(avg_invoice_amount, "${:,.0f}"))
 
@@ -624,12 +822,12 @@ with tab_vendors:
 
         item_select = st.selectbox(
             "Select an item to compare prices across vendors",
-            options=sorted(filtered_invoices["item_name"].unique()),
+            options=item_options,
         )
 
         item_data = filtered_invoices[filtered_invoices["item_name"] == item_select]
         cmp_df = (
-            item_data.groupby("vendor")
+            item_data.groupby("vendor", observed=True)
             .agg(
                 avg_price=("unit_price", "mean"),
                 total_qty=("quantity", "sum"),
@@ -664,7 +862,7 @@ with tab_vendors:
 
 # ---------- TAB 3: PLANNING & SEASONALITY ----------
 
-with tab_planning:
+if active_tab == "Planning & Seasonality":
     st.subheader("Seasonal Cost Analysis & Planning")
 
     if filtered_invoices.empty:
@@ -673,18 +871,16 @@ with tab_planning:
         # Seasonal cost for chosen items
         st.caption("Seasonal Cost for Selected Items")
 
-        items = sorted(filtered_invoices["item_name"].unique())
         selected_items = st.multiselect(
             "Select one or more items to see cost over time",
-            options=items,
-            default=items[:3],
+            options=item_options,
+            default=item_options[:3],
         )
 
         if selected_items:
             seasonal = (
                 filtered_invoices[filtered_invoices["item_name"].isin(selected_items)]
-                .assign(month=lambda d: d["invoice_date"].dt.to_period("M").dt.to_timestamp())
-                .groupby(["item_name", "month"])["line_total"]
+                .groupby(["item_name", "month"], observed=True)["line_total"]
                 .sum()
                 .reset_index()
             )
@@ -709,16 +905,8 @@ with tab_planning:
         # Category mix over time (100% stacked bar)
         st.subheader("Category Mix Over Time")
 
-        cat_mix = (
-            filtered_invoices.assign(month=lambda d: d["invoice_date"].dt.to_period("M").dt.to_timestamp())
-            .groupby(["month", "category"])["line_total"]
-            .sum()
-            .reset_index()
-        )
+        cat_mix = compute_cat_mix(filtered_invoices)
         if not cat_mix.empty:
-            total_per_month = cat_mix.groupby("month")["line_total"].transform("sum")
-            cat_mix["share"] = cat_mix["line_total"] / total_per_month * 100
-
             mix_chart = (
                 alt.Chart(cat_mix)
                 .mark_bar()
@@ -739,18 +927,14 @@ with tab_planning:
         # Simple spending forecast using average daily spend
         st.subheader("Simple Spending Forecast")
 
-        # Focus on current month for forecast
-        month_mask = (filtered_invoices["invoice_date"] >= current_month_start) & (
-            filtered_invoices["invoice_date"] <= period_end
-        )
-        month_data = filtered_invoices[month_mask]
+        # Focus on current month for forecast (window totals computed above)
         days_passed = max(
             1,
             (min(period_end, pd.to_datetime(end_date)) - current_month_start).days + 1,
         )
 
-        if not month_data.empty:
-            spent_so_far = month_data["line_total"].sum()
+        if current_month_rows:
+            spent_so_far = current_month_spend
             avg_daily = spent_so_far / days_passed
             days_in_month = (current_month_start + pd.offsets.MonthEnd(0)).day
             projected_month_end = avg_daily * days_in_month
@@ -777,7 +961,7 @@ with tab_planning:
 
 # ---------- TAB 4: OPERATIONS & DELIVERY PATTERNS ----------
 
-with tab_ops:
+if active_tab == "Operations":
     st.subheader("Ordering & Delivery Patterns")
 
     if filtered_invoices.empty:
@@ -785,16 +969,13 @@ with tab_ops:
     else:
         # Deliveries by weekday
         st.caption("Deliveries / Invoices by Weekday")
-        inv_count = (
-            filtered_invoices.assign(weekday=lambda d: d["invoice_date"].dt.day_name())
-            .groupby("weekday")["invoice_id"]
-            .nunique()
-            .reset_index()
+        inv_count = load_weekday_counts(
+            start_datetime,
+            end_datetime,
+            locations_selected_ids,
+            vendors_selected_ids,
+            category_filter
         )
-        # Preserve natural weekday ordering
-        weekday_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-        inv_count["weekday"] = pd.Categorical(inv_count["weekday"], categories=weekday_order, ordered=True)
-        inv_count = inv_count.sort_values("weekday")
 
         weekday_chart = (
             alt.Chart(inv_count)
@@ -812,16 +993,12 @@ with tab_ops:
 
         st.subheader("Recent Invoices Feed")
 
-        # Build invoice summary (one row per invoice)
-        invoice_summary = (
-            filtered_invoices.groupby(["invoice_id", "invoice_date", "vendor", "location"])["line_total"]
-            .sum()
-            .reset_index()
-            .sort_values("invoice_date", ascending=False)
-        )
+        # 20 most recent invoices, newest first (one row per invoice); nlargest
+        # selects them without sorting every invoice
+        invoice_summary = compute_invoice_totals(filtered_invoices).nlargest(20, "invoice_date")
 
         st.dataframe(
-            invoice_summary.head(20).rename(
+            invoice_summary.rename(
                 columns={
                     "invoice_id": "Invoice ID",
                     "invoice_date": "Date",
@@ -838,7 +1015,7 @@ with tab_ops:
             st.subheader("Location Comparison")
 
             loc_spend = (
-                filtered_invoices.groupby("location")["line_total"]
+                filtered_invoices.groupby("location", observed=True)["line_total"]
                 .sum()
                 .reset_index()
                 .rename(columns={"line_total": "Total Spend"})
@@ -125,14 +125,11 @@ def compute_weekly_spend(df: pd.DataFrame):
 def compute_monthly_spend(df: pd.DataFrame):
     if df.empty:
         return pd.DataFrame(columns=["month", "total_spend"])
-    monthly = (
-        df.set_index("invoice_date")
-        .resample("M")["line_total"]
-        .sum()
-        .reset_index()
-    )
-    monthly["month"] = monthly["invoice_date"].dt.to_period("M").dt.to_timestamp()
-    monthly = monthly[["month", "total_spend"]]
+    # Truncate to the month start in numpy and group on that: no resample("M")
+    # (deprecated) and no second Period round-trip to label the months
+    month = df["invoice_date"].to_numpy(dtype="datetime64[ns]").astype("datetime64[M]").astype("datetime64[ns]")
+    monthly = df.groupby(month, sort=True)["line_total"].sum().reset_index()
+    monthly.columns = ["month", "total_spend"]
     return monthly
 
 
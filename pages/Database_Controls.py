@@ -1,21 +1,149 @@
+import io
 import streamlit as st
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable, Optional, Tuple
 from bson import ObjectId
-from bson.decimal128 import Decimal128
+from pymongo.errors import BulkWriteError
 
+from src.storage.db_init import create_indexes
 from src.storage.database import (
     db,
     cleanup_old_temp_uploads,
     create_vendor,
-    get_all_vendors,
+    get_all_vendor_details,
     save_vendor_regex_template,
     get_vendor_regex_patterns,
     insert_master_category,
+    insert_master_categories,
     get_all_category_names
 )
 
+# CSV export columns, in file order
+INVOICE_EXPORT_FIELDS = ["Invoice ID", "Invoice Number", "Date", "Vendor", "Total Amount", "Order Number"]
+LINE_ITEM_EXPORT_FIELDS = [
+    "Invoice Number", "Vendor", "Line Number", "Description",
+    "Quantity", "Unit", "Unit Price", "Line Total", "Category"
+]
+LINE_ITEM_EXPORT_PROJECTION = {
+    "_id": 0, "line_number": 1, "description": 1, "quantity": 1,
+    "unit": 1, "unit_price": 1, "line_total": 1, "category": 1
+}
+# Documents per cursor batch while writing an export
+EXPORT_BATCH_SIZE = 1000
+
+
+def _cutoff_for(range_label: str) -> Optional[datetime]:
+    """Earliest invoice date for an export date-range option (None = all time)."""
+    now = datetime.now()
+    if range_label == "Last 30 Days":
+        return now - timedelta(days=30)
+    if range_label == "Last 90 Days":
+        return now - timedelta(days=90)
+    if range_label == "This Year":
+        return datetime(now.year, 1, 1)
+    return None
+
+
+def _export_query(range_label: str) -> Dict[str, Any]:
+    """Invoice filter for an export date-range option."""
+    cutoff = _cutoff_for(range_label)
+    return {"invoice_date": {"$gte": cutoff}} if cutoff else {}
+
+
+def _to_double(field: str) -> Dict[str, Any]:
+    """
+    Aggregation expression converting a Decimal128 (or numeric) field to a double
+    on the server, so export rows need no per-cell conversion. Missing values
+    export as 0, as before.
+    """
+    return {"$convert": {"input": field, "to": "double", "onError": None, "onNull": 0}}
+
+
+def _export_csv(rows: Iterable[Dict[str, Any]], fields: List[str]) -> Tuple[bytes, int]:
+    """
+    Write export rows to CSV with pyarrow's C++ writer.
+    
+    Args:
+        rows: Documents already shaped by the pipeline, keyed by CSV header
+        fields: CSV headers in file order
+    
+    Returns:
+        CSV bytes and the number of rows written
+    """
+    # Collect columns straight from the cursor; no per-row dicts are built
+    columns: Dict[str, list] = {field: [] for field in fields}
+    row_count = 0
+    for row in rows:
+        for field in fields:
+            columns[field].append(row.get(field))
+        row_count += 1
+    
+    buf = io.BytesIO()
+    pa_csv.write_csv(pa.table(columns), buf)
+    return buf.getvalue(), row_count
+
+
+@st.cache_data(ttl=120, show_spinner=False)
+def _cached_vendors() -> List[Dict[str, Any]]:
+    """Vendor list for the Vendor Management tab; cleared when a vendor is added."""
+    return get_all_vendor_details()
+
+
+@st.cache_data(ttl=120, show_spinner=False)
+def _cached_categories() -> List[Dict[str, Any]]:
+    """Category list for the Category Management tab; cleared when a category is added."""
+    return list(db.categories.find({}, {"name": 1, "type": 1}))
+
+
+# Vendor regex template fields, in stored order, with their display labels and widget keys
+_PATTERN_NAMES = (
+    "Invoice Number",
+    "Invoice Date",
+    "Invoice Total Amount",
+    "Order Date",
+    "Line Item Block Start",
+    "Line Item Block End",
+    "Quantity",
+    "Description",
+    "Unit",
+    "Unit Price",
+    "Line Total"
+)
+PATTERN_LABELS = tuple(f"{idx}. {name}" for idx, name in enumerate(_PATTERN_NAMES))
+PATTERN_KEYS = tuple(f"existing_{idx}" for idx in range(len(_PATTERN_NAMES)))
+
+STATS_COLLECTIONS = ["invoices", "line_items", "vendors", "restaurants", "categories", "temp_uploads"]
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _fast_counts() -> Dict[str, int]:
+    """
+    Document count per collection for the Maintenance tab.
+    
+    No filter is ever applied here, so estimated_document_count() (collection
+    metadata) is used instead of count_documents({}), which scans every document.
+    Cached for a minute so widget reruns don't re-query the counts.
+    """
+    return {name: db[name].estimated_document_count() for name in STATS_COLLECTIONS}
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _db_info() -> Dict[str, Any]:
+    """Storage and index details from dbStats, cached for five minutes."""
+    db_stats = db.command("dbStats")
+    return {
+        "Database Name": db.name,
+        "Collections": db_stats.get("collections", "N/A"),
+        "Data Size": f"{db_stats.get('dataSize', 0) / 1024 / 1024:.2f} MB",
+        "Storage Size": f"{db_stats.get('storageSize', 0) / 1024 / 1024:.2f} MB",
+        "Indexes": db_stats.get("indexes", "N/A"),
+        "Index Size": f"{db_stats.get('indexSize', 0) / 1024 / 1024:.2f} MB"
+    }
+
+
 st.set_page_config(page_title="Database Controls", page_icon="🔧", layout="wide")
 
 st.title("🔧 Database Administration")
@@ -25,33 +153,46 @@ st.markdown("System maintenance, vendor management, category management, and bul
 if "admin_tab" not in st.session_state:
     st.session_state.admin_tab = "Maintenance"
 
-# Tab selection
-tab1, tab2, tab3, tab4 = st.tabs(["🧹 Maintenance", "👥 Vendor Management", "🏷️ Category Management", "📦 Bulk Operations"])
+# Tab selection. st.tabs would run every tab's queries on each rerun; with a
+# radio only the selected tab's body (and its database calls) executes.
+ADMIN_TABS = {
+    "Maintenance": "🧹 Maintenance",
+    "Vendor Management": "👥 Vendor Management",
+    "Category Management": "🏷️ Category Management",
+    "Bulk Operations": "📦 Bulk Operations",
+}
+st.radio(
+    "Section",
+    list(ADMIN_TABS),
+    format_func=ADMIN_TABS.get,
+    horizontal=True,
+    label_visibility="collapsed",
+    key="admin_tab"
+)
 
 # TAB 1: MAINTENANCE
-with tab1:
+if st.session_state.admin_tab == "Maintenance":
     st.header("🧹 Database Maintenance")
     
     st.markdown("### 📊 Database Statistics")
     
+    if st.button("🔄 Refresh Statistics"):
+        _fast_counts.clear()
+        _db_info.clear()
+    
     try:
         # Get collection counts
-        invoices_count = db.invoices.count_documents({})
-        line_items_count = db.line_items.count_documents({})
-        vendors_count = db.vendors.count_documents({})
-        restaurants_count = db.restaurants.count_documents({})
-        categories_count = db.categories.count_documents({})
-        temp_uploads_count = db.temp_uploads.count_documents({})
+        counts = _fast_counts()
         
         col1, col2, col3 = st.columns(3)
-        col1.metric("📄 Invoices", f"{invoices_count:,}")
-        col2.metric("📦 Line Items", f"{line_items_count:,}")
-        col3.metric("👥 Vendors", f"{vendors_count:,}")
+        col1.metric("📄 Invoices", f"{counts['invoices']:,}")
+        col2.metric("📦 Line Items", f"{counts['line_items']:,}")
+        col3.metric("👥 Vendors", f"{counts['vendors']:,}")
         
         col4, col5, col6 = st.columns(3)
-        col4.metric("🏢 Restaurants", f"{restaurants_count:,}")
-        col5.metric("🏷️ Categories", f"{categories_count:,}")
-        col6.metric("⏳ Temp Uploads", f"{temp_uploads_count:,}")
+        col4.metric("🏢 Restaurants", f"{counts['restaurants']:,}")
+        col5.metric("🏷️ Categories", f"{counts['categories']:,}")
+        col6.metric("⏳ Temp Uploads", f"{counts['temp_uploads']:,}")
         
     except Exception as e:
         st.error(f"Error fetching statistics: {str(e)}")
@@ -80,6 +221,7 @@ with tab1:
                 with st.spinner("Cleaning temporary uploads..."):
                     deleted_count = cleanup_old_temp_uploads(days=days_to_keep)
                     st.success(f"✅ Cleaned {deleted_count} temporary upload(s) older than {days_to_keep} days")
+                    _fast_counts.clear()
             except Exception as e:
                 st.error(f"Error during cleanup: {str(e)}")
     
@@ -90,44 +232,45 @@ with tab1:
         if st.button("📊 Show Database Info", use_container_width=True):
             try:
                 # Get database stats
-                db_stats = db.command("dbStats")
-                
-                st.json({
-                    "Database Name": db.name,
-                    "Collections": db_stats.get("collections", "N/A"),
-                    "Data Size": f"{db_stats.get('dataSize', 0) / 1024 / 1024:.2f} MB",
-                    "Storage Size": f"{db_stats.get('storageSize', 0) / 1024 / 1024:.2f} MB",
-                    "Indexes": db_stats.get("indexes", "N/A"),
-                    "Index Size": f"{db_stats.get('indexSize', 0) / 1024 / 1024:.2f} MB"
-                })
+                st.json(_db_info())
             except Exception as e:
                 st.error(f"Error fetching database info: {str(e)}")
+        
+        st.markdown("#### Indexes")
+        st.markdown("Create any missing indexes used by date-filtered queries and exports")
+        
+        if st.button("🗂️ Verify Indexes", use_container_width=True):
+            try:
+                with st.spinner("Verifying indexes..."):
+                    create_indexes(db)
+                    _db_info.clear()
+                st.success("✅ Indexes verified")
+            except Exception as e:
+                st.error(f"Error creating indexes: {str(e)}")
 
 # TAB 2: VENDOR MANAGEMENT
-with tab2:
+if st.session_state.admin_tab == "Vendor Management":
     st.header("👥 Vendor Management")
     
     # List existing vendors
     st.markdown("### 📋 Existing Vendors")
     
     try:
-        vendors = get_all_vendors()
+        # Contact details come back with the names, so no per-vendor lookup
+        vendors = _cached_vendors()
         
         if vendors:
             # Create display dataframe
             vendor_data = []
             for vendor in vendors:
-                # Get additional vendor details
-                full_vendor = db.vendors.find_one({"_id": vendor["_id"]})
-                if full_vendor:
-                    vendor_data.append({
-                        "Name": vendor["name"],
-                        "Email": full_vendor.get("email", ""),
-                        "Phone": full_vendor.get("phone", ""),
-                        "Website": full_vendor.get("website", ""),
-                        "Active": "✅" if full_vendor.get("is_active", True) else "❌",
-                        "_id": str(vendor["_id"])
-                    })
+                vendor_data.append({
+                    "Name": vendor["name"],
+                    "Email": vendor.get("email", ""),
+                    "Phone": vendor.get("phone", ""),
+                    "Website": vendor.get("website", ""),
+                    "Active": "✅" if vendor.get("is_active", True) else "❌",
+                    "_id": str(vendor["_id"])
+                })
             
             vendor_df = pd.DataFrame(vendor_data)
             
@@ -180,6 +323,7 @@ with tab2:
                 
                 if vendor_id:
                     st.success(f"✅ Vendor added successfully! ID: {vendor_id}")
+                    _cached_vendors.clear()
                     st.rerun()
                 else:
                     st.error("❌ Error adding vendor: Failed to create vendor")
@@ -212,29 +356,15 @@ with tab2:
                     st.info(f"✅ Regex templates exist for {selected_vendor_name}")
                     
                     with st.expander("View Existing Patterns"):
-                        pattern_labels = [
-                            "Invoice Number",
-                            "Invoice Date",
-                            "Invoice Total Amount",
-                            "Order Date",
-                            "Line Item Block Start",
-                            "Line Item Block End",
-                            "Quantity",
-                            "Description",
-                            "Unit",
-                            "Unit Price",
-                            "Line Total"
-                        ]
-                        
-                        for idx, (label, pattern) in enumerate(zip(pattern_labels, existing_patterns)):
-                            st.text_input(f"{idx}. {label}", value=pattern, disabled=True, key=f"existing_{idx}")
+                        for label, key, pattern in zip(PATTERN_LABELS, PATTERN_KEYS, existing_patterns):
+                            st.text_input(label, value=pattern, disabled=True, key=key)
                 else:
                     st.warning(f"⚠️ No regex templates found for {selected_vendor_name}")
                 
                 st.markdown("**Note:** Regex template management requires technical knowledge. Contact system administrator for pattern configuration.")
 
 # TAB 3: CATEGORY MANAGEMENT
-with tab3:
+if st.session_state.admin_tab == "Category Management":
     st.header("🏷️ Category Management")
     
     # List existing categories
@@ -242,7 +372,7 @@ with tab3:
     
     try:
         # Get all categories from database
-        categories = list(db.categories.find({}))
+        categories = _cached_categories()
         
         if categories:
             # Create display dataframe
@@ -256,23 +386,22 @@ with tab3:
             
             cat_df = pd.DataFrame(cat_data)
             
-            # Check if all types are empty
-            has_types = cat_df["Type"].notna().any() and (cat_df["Type"] != "").any()
+            # Missing types become "" once, so a single mask separates typed rows
+            cat_df["Type"] = cat_df["Type"].fillna("")
+            has_type = cat_df["Type"] != ""
             
-            if has_types:
-                # Group by type
-                for cat_type in cat_df["Type"].unique():
-                    if cat_type:  # Skip empty types
-                        with st.expander(f"📁 {cat_type}", expanded=True):
-                            type_cats = cat_df[cat_df["Type"] == cat_type].drop(columns=["_id", "Type"])
-                            st.dataframe(
-                                type_cats,
-                                width='stretch',
-                                hide_index=True
-                            )
+            if has_type.any():
+                # Group by type (one partitioning pass instead of a mask per type)
+                for cat_type, type_cats in cat_df[has_type].groupby("Type", sort=False):
+                    with st.expander(f"📁 {cat_type}", expanded=True):
+                        st.dataframe(
+                            type_cats.drop(columns=["_id", "Type"]),
+                            width='stretch',
+                            hide_index=True
+                        )
                 
                 # Show uncategorized if any
-                uncategorized = cat_df[(cat_df["Type"].isna()) | (cat_df["Type"] == "")]
+                uncategorized = cat_df[~has_type]
                 if not uncategorized.empty:
                     with st.expander("📁 Uncategorized", expanded=True):
                         st.dataframe(
@@ -329,12 +458,55 @@ with tab3:
                     st.success(f"✅ Category added successfully! ID: {result.inserted_id}")
                     # Also add to master category list
                     insert_master_category(new_cat_name)
+                    _cached_categories.clear()
                     st.rerun()
                 else:
                     st.error("❌ Error adding category")
             except Exception as e:
                 st.error(f"❌ Error: {str(e)}")
     
+    with st.expander("➕ Add Several Categories"):
+        bulk_cat_names = st.text_area("Category Names (one per line)", placeholder="Dairy Products\nFrozen Foods")
+        bulk_cat_type = st.selectbox(
+            "Category Type *",
+            ["", "Food", "Beverage", "Supplies", "Equipment", "Service", "Other"],
+            key="bulk_cat_type"
+        )
+        
+        if st.button("💾 Add Categories"):
+            # Drop blanks and repeats, keeping the pasted order
+            names = list(dict.fromkeys(n.strip() for n in bulk_cat_names.splitlines() if n.strip()))
+            if not names or not bulk_cat_type:
+                st.error("❌ At least one category name and a type are required")
+            else:
+                try:
+                    # One round-trip per collection write instead of two per category
+                    rejected = 0
+                    try:
+                        result = db.categories.insert_many(
+                            [{"name": name, "type": bulk_cat_type} for name in names],
+                            ordered=False
+                        )
+                        inserted = len(result.inserted_ids)
+                    except BulkWriteError as e:
+                        # Unordered inserts may still have written some documents
+                        inserted = e.details.get("nInserted", 0)
+                        rejected = len(e.details.get("writeErrors", []))
+                    # The {_id: name} master list is what category lookups read,
+                    # so update it even when some documents above were rejected
+                    insert_master_categories(names)
+                    _cached_categories.clear()
+                    if rejected:
+                        st.warning(
+                            f"⚠️ Inserted {inserted} category documents, {rejected} rejected; "
+                            f"all {len(names)} names were added to the master list"
+                        )
+                    else:
+                        st.success(f"✅ Added {inserted} categories")
+                        st.rerun()
+                except Exception as e:
+                    st.error(f"❌ Error: {str(e)}")
+    
     st.divider()
     
     # Category mapping info
@@ -343,7 +515,12 @@ with tab3:
     
     try:
         # Show sample of categorized items
-        sample_items = list(db.line_items.find({"category": {"$exists": True, "$ne": None}}).limit(10))
+        # $type gives tight bounds on the category index, so the scan stops after
+        # 10 keys however sparse categorized items are ($ne: None could not)
+        sample_items = list(db.line_items.find(
+            {"category": {"$type": "string"}},
+            {"_id": 0, "description": 1, "category": 1}
+        ).limit(10))
         
         if sample_items:
             st.markdown("**Sample Categorized Items:**")
@@ -362,7 +539,7 @@ with tab3:
         st.error(f"Error loading sample: {str(e)}")
 
 # TAB 4: BULK OPERATIONS
-with tab4:
+if st.session_state.admin_tab == "Bulk Operations":
     st.header("📦 Bulk Operations")
     
     st.markdown("### 📥 Export Data")
@@ -384,56 +561,51 @@ with tab4:
             try:
                 with st.spinner("Preparing export..."):
                     # Build query based on date range
-                    query = {}
-                    if export_date_range == "Last 30 Days":
-                        cutoff = datetime.now() - timedelta(days=30)
-                        query["invoice_date"] = {"$gte": cutoff}
-                    elif export_date_range == "Last 90 Days":
-                        cutoff = datetime.now() - timedelta(days=90)
-                        query["invoice_date"] = {"$gte": cutoff}
-                    elif export_date_range == "This Year":
-                        cutoff = datetime(datetime.now().year, 1, 1)
-                        query["invoice_date"] = {"$gte": cutoff}
+                    query = _export_query(export_date_range)
+                    
+                    # Fetch invoices with their vendor name joined server-side
+                    pipeline = [
+                        {"$match": query},
+                        {
+                            "$lookup": {
+                                "from": "vendors",
+                                "localField": "vendor_id",
+                                "foreignField": "_id",
+                                "pipeline": [{"$project": {"_id": 0, "name": 1}}],
+                                "as": "vendor"
+                            }
+                        },
+                        {
+                            # Shape each row as its CSV line, headers as field names
+                            "$project": {
+                                "_id": 0,
+                                "Invoice ID": {"$toString": "$_id"},
+                                "Invoice Number": {"$toString": "$invoice_number"},
+                                "Date": {"$dateToString": {"format": "%Y-%m-%d", "date": "$invoice_date", "onNull": ""}},
+                                "Vendor": {"$ifNull": [{"$arrayElemAt": ["$vendor.name", 0]}, "Unknown"]},
+                                "Total Amount": _to_double("$invoice_total_amount"),
+                                "Order Number": {"$toString": "$order_number"}
+                            }
+                        }
+                    ]
                     
-                    # Fetch invoices
-                    invoices = list(db.invoices.find(query))
+                    csv_data, invoice_count = _export_csv(
+                        db.invoices.aggregate(pipeline, allowDiskUse=True, batchSize=EXPORT_BATCH_SIZE),
+                        INVOICE_EXPORT_FIELDS
+                    )
                     
-                    if not invoices:
+                    if not invoice_count:
                         st.warning("No invoices found for the selected date range.")
                     else:
-                        # Prepare data
-                        export_data = []
-                        for inv in invoices:
-                            # Get vendor name
-                            vendor = db.vendors.find_one({"_id": inv.get("vendor_id")})
-                            vendor_name = vendor["name"] if vendor else "Unknown"
-                            
-                            # Convert Decimal128 to float
-                            total = inv.get("invoice_total_amount", 0)
-                            if isinstance(total, Decimal128):
-                                total = float(total.to_decimal())
-                            
-                            export_data.append({
-                                "Invoice ID": str(inv["_id"]),
-                                "Invoice Number": inv.get("invoice_number", ""),
-                                "Date": inv.get("invoice_date", "").strftime("%Y-%m-%d") if isinstance(inv.get("invoice_date"), datetime) else "",
-                                "Vendor": vendor_name,
-                                "Total Amount": total,
-                                "Order Number": inv.get("order_number", "")
-                            })
-                        
-                        export_df = pd.DataFrame(export_data)
-                        csv = export_df.to_csv(index=False)
-                        
                         st.download_button(
-                            label=f"💾 Download {len(invoices)} Invoices",
-                            data=csv,
+                            label=f"💾 Download {invoice_count} Invoices",
+                            data=csv_data,
                             file_name=f"invoices_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                             mime="text/csv",
                             use_container_width=True
                         )
                         
-                        st.success(f"✅ Ready to download {len(invoices)} invoices")
+                        st.success(f"✅ Ready to download {invoice_count} invoices")
             
             except Exception as e:
                 st.error(f"Error exporting invoices: {str(e)}")
@@ -451,81 +623,66 @@ with tab4:
             try:
                 with st.spinner("Preparing export..."):
                     # Build query for invoices based on date range
-                    invoice_query = {}
-                    if export_li_date_range == "Last 30 Days":
-                        cutoff = datetime.now() - timedelta(days=30)
-                        invoice_query["invoice_date"] = {"$gte": cutoff}
-                    elif export_li_date_range == "Last 90 Days":
-                        cutoff = datetime.now() - timedelta(days=90)
-                        invoice_query["invoice_date"] = {"$gte": cutoff}
-                    elif export_li_date_range == "This Year":
-                        cutoff = datetime(datetime.now().year, 1, 1)
-                        invoice_query["invoice_date"] = {"$gte": cutoff}
+                    invoice_query = _export_query(export_li_date_range)
                     
-                    # Get invoice IDs
-                    invoices = list(db.invoices.find(invoice_query, {"_id": 1, "invoice_number": 1, "vendor_id": 1}))
-                    invoice_ids = [inv["_id"] for inv in invoices]
+                    # Join line items with their invoice and vendor in one pipeline
+                    pipeline = [
+                        {"$match": invoice_query},
+                        {"$project": {"invoice_number": 1, "vendor_id": 1}},
+                        {
+                            "$lookup": {
+                                "from": "line_items",
+                                "localField": "_id",
+                                "foreignField": "invoice_id",
+                                # Only the exported columns are joined into each invoice
+                                "pipeline": [{"$project": LINE_ITEM_EXPORT_PROJECTION}],
+                                "as": "li"
+                            }
+                        },
+                        {"$unwind": "$li"},
+                        {
+                            "$lookup": {
+                                "from": "vendors",
+                                "localField": "vendor_id",
+                                "foreignField": "_id",
+                                "pipeline": [{"$project": {"_id": 0, "name": 1}}],
+                                "as": "vendor"
+                            }
+                        },
+                        {
+                            # Shape each row as its CSV line, headers as field names
+                            "$project": {
+                                "_id": 0,
+                                "Invoice Number": {"$toString": "$invoice_number"},
+                                "Vendor": {"$ifNull": [{"$arrayElemAt": ["$vendor.name", 0]}, "Unknown"]},
+                                "Line Number": {"$toString": "$li.line_number"},
+                                "Description": "$li.description",
+                                "Quantity": _to_double("$li.quantity"),
+                                "Unit": "$li.unit",
+                                "Unit Price": _to_double("$li.unit_price"),
+                                "Line Total": _to_double("$li.line_total"),
+                                "Category": "$li.category"
+                            }
+                        }
+                    ]
                     
-                    # Create lookup dict for invoice numbers
-                    inv_lookup = {inv["_id"]: inv for inv in invoices}
+                    csv_data, line_item_count = _export_csv(
+                        db.invoices.aggregate(pipeline, allowDiskUse=True, batchSize=EXPORT_BATCH_SIZE),
+                        LINE_ITEM_EXPORT_FIELDS
+                    )
                     
-                    if not invoice_ids:
-                        st.warning("No invoices found for the selected date range.")
+                    if not line_item_count:
+                        st.warning("No line items found for the selected date range.")
                     else:
-                        # Fetch line items
-                        line_items = list(db.line_items.find({"invoice_id": {"$in": invoice_ids}}))
+                        st.download_button(
+                            label=f"💾 Download {line_item_count} Line Items",
+                            data=csv_data,
+                            file_name=f"line_items_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                            mime="text/csv",
+                            use_container_width=True
+                        )
                         
-                        if not line_items:
-                            st.warning("No line items found.")
-                        else:
-                            # Prepare data
-                            export_data = []
-                            for li in line_items:
-                                invoice = inv_lookup.get(li.get("invoice_id"))
-                                
-                                # Get vendor name
-                                vendor_name = "Unknown"
-                                if invoice:
-                                    vendor = db.vendors.find_one({"_id": invoice.get("vendor_id")})
-                                    vendor_name = vendor["name"] if vendor else "Unknown"
-                                
-                                # Convert Decimal128 fields
-                                quantity = li.get("quantity", 0)
-                                if isinstance(quantity, Decimal128):
-                                    quantity = float(quantity.to_decimal())
-                                
-                                unit_price = li.get("unit_price", 0)
-                                if isinstance(unit_price, Decimal128):
-                                    unit_price = float(unit_price.to_decimal())
-                                
-                                line_total = li.get("line_total", 0)
-                                if isinstance(line_total, Decimal128):
-                                    line_total = float(line_total.to_decimal())
-                                
-                                export_data.append({
-                                    "Invoice Number": invoice.get("invoice_number", "") if invoice else "",
-                                    "Vendor": vendor_name,
-                                    "Line Number": li.get("line_number", ""),
-                                    "Description": li.get("description", ""),
-                                    "Quantity": quantity,
-                                    "Unit": li.get("unit", ""),
-                                    "Unit Price": unit_price,
-                                    "Line Total": line_total,
-                                    "Category": li.get("category", "")
-                                })
-                            
-                            export_df = pd.DataFrame(export_data)
-                            csv = export_df.to_csv(index=False)
-                            
-                            st.download_button(
-                                label=f"💾 Download {len(line_items)} Line Items",
-                                data=csv,
-                                file_name=f"line_items_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                                mime="text/csv",
-                                use_container_width=True
-                            )
-                            
-                            st.success(f"✅ Ready to download {len(line_items)} line items")
+                        st.success(f"✅ Ready to download {line_item_count} line items")
             
             except Exception as e:
                 st.error(f"Error exporting line items: {str(e)}")
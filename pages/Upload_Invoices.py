@@ -1,33 +1,61 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import re
 import uuid
+import hashlib
+import io
 import logging
+import shutil
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
 import sys
 import os
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
+# Uploaded files extracted in parallel (same setting as the batch pipeline)
+UPLOAD_WORKERS = int(os.getenv("PIPELINE_WORKERS", "4"))
+# Uploads are copied to disk in chunks of this size
+UPLOAD_COPY_BUFSIZE = 1024 * 1024
+
+# Fields load_invoice_for_editing reads from the invoice and its line items
+EDITOR_INVOICE_FIELDS = ["invoice_number", "invoice_date", "invoice_total_amount", "order_number", "vendor_id"]
+EDITOR_LINE_ITEM_FIELDS = ["line_number", "description", "quantity", "unit", "unit_price", "line_total"]
+
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
 
 from src.extraction.invoice_extractor import process_invoice
+from src.extraction.ocr_processor import preload_ocr_router
 from src.processing.build_dataframe import get_structured_data_from_text
+from src.processing.extraction_cache import (
+    make_extraction_key,
+    get_cached_extraction,
+    put_cached_extraction,
+    get_cached_text,
+    put_cached_text
+)
 from src.storage.database import (
     db,
     save_inv_li_to_db,
+    save_inv_li_batch,
     save_temp_upload,
     get_temp_upload,
     delete_temp_upload,
     check_duplicate_invoice,
+    find_duplicate_invoices,
     update_invoice,
-    update_line_item,
     add_line_item,
-    delete_line_item,
+    delete_invoice,
+    save_line_item_changes,
     get_vendor_name_by_id,
+    get_vendor_names_by_ids,
     get_invoice_by_id,
     get_all_vendors
 )
@@ -36,6 +64,35 @@ from bson.decimal128 import Decimal128
 
 st.set_page_config(page_title="Upload & Manage Invoices", page_icon="📤", layout="wide")
 
+# Review card badge per extraction status
+STATUS_ICONS = {
+    "success": "🟢",
+    "partial": "🟡",
+    "duplicate": "🟠",
+    "failed": "🔴"
+}
+
+FAILED_EXTRACTION_CAUSES = """
+- File is corrupted or unreadable
+- Image quality too poor for OCR
+- Unsupported file format
+- File contains no readable text
+"""
+
+# Line item editor columns, shared by the review cards and the saved invoice editor
+LINE_ITEM_COLUMN_CONFIG = {
+    "description": st.column_config.TextColumn("Description", width="large"),
+    "quantity": st.column_config.NumberColumn("Quantity", format="%.2f"),
+    "unit": st.column_config.TextColumn("Unit"),
+    "unit_price": st.column_config.NumberColumn("Unit Price", format="$%.2f"),
+    "line_total": st.column_config.NumberColumn("Line Total", format="$%.2f")
+}
+SAVED_LINE_ITEM_COLUMN_CONFIG = {
+    "_id": None,  # Hide ID column
+    "line_number": None,  # Hide line number
+    **LINE_ITEM_COLUMN_CONFIG
+}
+
 # Initialize session state
 if "session_id" not in st.session_state:
     st.session_state.session_id = str(uuid.uuid4())
@@ -82,9 +139,35 @@ def save_session_to_db():
     save_temp_upload(st.session_state.session_id, upload_data)
 
 
-def process_single_file(uploaded_file, temp_dir: Path) -> Dict[str, Any]:
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_vendors() -> List[Dict[str, Any]]:
+    """Vendor dropdown options; cleared by the Refresh vendors button."""
+    return get_all_vendors()
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_duplicate_id(vendor_id: str, invoice_number: str) -> Optional[str]:
+    """Existing invoice _id for this vendor + invoice number, if any (manual entry warning)."""
+    duplicate = check_duplicate_invoice(vendor_id, invoice_number)
+    return str(duplicate["_id"]) if duplicate else None
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_default_restaurant_id() -> str:
+    """Return the restaurant that uploaded invoices are attributed to."""
+    restaurant = db["restaurants"].find_one({}, {"_id": 1})
+    return str(restaurant["_id"]) if restaurant else "000000000000000000000000"
+
+
+def process_single_file(uploaded_file, temp_dir: Path, restaurant_id: str) -> Dict[str, Any]:
     """
     Process a single uploaded file and extract invoice data.
+    Runs inside a worker thread, so it must not call Streamlit.
+    
+    Args:
+        uploaded_file: Streamlit UploadedFile to extract
+        temp_dir: Directory the file is written to for extraction (one per file)
+        restaurant_id: Restaurant the invoice is attributed to
     
     Returns:
         Dictionary containing extraction results and status
@@ -104,13 +187,27 @@ def process_single_file(uploaded_file, temp_dir: Path) -> Dict[str, Any]:
     }
     
     try:
-        # Save uploaded file temporarily
+        # Save uploaded file temporarily, hashing it on the way to disk
         file_path = temp_dir / uploaded_file.name
+        uploaded_file.seek(0)
+        hasher = hashlib.sha256()
         with open(file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
+            while chunk := uploaded_file.read(UPLOAD_COPY_BUFSIZE):
+                hasher.update(chunk)
+                f.write(chunk)
+        file_key = hasher.hexdigest()
         
-        # Step 1: Extract text using process_invoice
-        extracted_text, filename, text_length, page_count, extraction_timestamp  = process_invoice(str(file_path))
+        # Step 1: Extract text (reused if these exact bytes were uploaded before)
+        cached_text = get_cached_text(file_key)
+        if cached_text is not None:
+            logger.info("Text cache hit for %s", uploaded_file.name)
+            extracted_text, text_length, page_count = cached_text
+            filename = file_path.name
+            extraction_timestamp = datetime.now().isoformat()
+        else:
+            extracted_text, filename, text_length, page_count, extraction_timestamp  = process_invoice(str(file_path))
+            if extracted_text and extracted_text.strip():
+                put_cached_text(file_key, extracted_text, text_length, page_count)
         
         # Handle tuple return (text, filename, text_length, page_count, timestamp)
         # if isinstance(extraction_result, tuple):
@@ -126,23 +223,36 @@ def process_single_file(uploaded_file, temp_dir: Path) -> Dict[str, Any]:
         
         result["extracted_text"] = extracted_text
         
-        # Step 2: Build structured dataframes
-        # Get default restaurant_id from database
-        restaurant = db["restaurants"].find_one({}, {"_id": 1})
-        restaurant_id = str(restaurant["_id"]) if restaurant else "000000000000000000000000"
-        print(f"\n[INFO] Page on file: {file_path}")
-        inv_df, li_df = get_structured_data_from_text(
-            extracted_text=extracted_text,
+        # Step 2: Build structured dataframes (skips the LLM for text seen before)
+        cache_key = make_extraction_key(extracted_text)
+        cached = get_cached_extraction(
+            cache_key,
             filename=filename,
-            text_length=text_length,
-            page_count=page_count,  
-            extraction_timestamp=extraction_timestamp,
             restaurant_id=restaurant_id,
-            file_path=file_path
+            text_length=text_length,
+            page_count=page_count,
+            extraction_timestamp=extraction_timestamp
         )
+        if cached is not None:
+            logger.info("Extraction cache hit for %s", file_path)
+            inv_df, li_df = cached
+        else:
+            logger.info("Building invoice data for %s", file_path)
+            inv_df, li_df = get_structured_data_from_text(
+                extracted_text=extracted_text,
+                filename=filename,
+                text_length=text_length,
+                page_count=page_count,  
+                extraction_timestamp=extraction_timestamp,
+                restaurant_id=restaurant_id,
+                file_path=file_path
+            )
+            if inv_df is not None and not inv_df.empty:
+                put_cached_extraction(cache_key, inv_df, li_df if li_df is not None else pd.DataFrame())
         
-        print(f"\n[INFO] Invoice DF (Upload_invoices.py) {inv_df}")
-        print(f"\n[INFO] Line item DF (Upload_invoices.py) {li_df}")
+        # %-style arguments: the DataFrames are only rendered when DEBUG is on
+        logger.debug("Invoice DF for %s:\n%s", filename, inv_df)
+        logger.debug("Line item DF for %s:\n%s", filename, li_df)
 
         if inv_df is None or inv_df.empty:
             result["status"] = "partial"
@@ -175,23 +285,12 @@ def process_single_file(uploaded_file, temp_dir: Path) -> Dict[str, Any]:
         if not inv_df.empty and "vendor_id" in inv_df.columns:
             vendor_id = inv_df.iloc[0]["vendor_id"]
             result["vendor_id"] = vendor_id
-            result["vendor_name"] = get_vendor_name_by_id(str(vendor_id)) or "Unknown"
+            # vendor_name is filled in for the whole batch by fill_vendor_names
         
-        # Check for duplicates
-        if not inv_df.empty and "invoice_number" in inv_df.columns and result["vendor_id"]:
-            invoice_number = inv_df.iloc[0]["invoice_number"]
-            duplicate = check_duplicate_invoice(str(result["vendor_id"]), str(invoice_number))
-            if duplicate:
-                result["is_duplicate"] = True
-                result["duplicate_id"] = str(duplicate["_id"])
-                result["status"] = "duplicate"
-                result["message"] = f"Duplicate found: Invoice #{invoice_number} already exists"
-            else:
-                result["status"] = "success"
-                result["message"] = "Extraction successful"
-        else:
-            result["status"] = "success"
-            result["message"] = "Extraction successful"
+        # Database duplicates are checked for the whole batch afterwards
+        # (see flag_database_duplicates)
+        result["status"] = "success"
+        result["message"] = "Extraction successful"
             
     except Exception as e:
         result["status"] = "failed"
@@ -201,6 +300,52 @@ def process_single_file(uploaded_file, temp_dir: Path) -> Dict[str, Any]:
     return result
 
 
+def fill_vendor_names(processed_data: List[Dict[str, Any]]) -> None:
+    """
+    Set vendor_name on every result with one vendor query for the whole batch.
+    
+    Args:
+        processed_data: Results from process_single_file, updated in place
+    """
+    vendor_ids = [str(r["vendor_id"]) for r in processed_data if r.get("vendor_id")]
+    if not vendor_ids:
+        return
+    
+    names = get_vendor_names_by_ids(vendor_ids)
+    for result in processed_data:
+        if result.get("vendor_id"):
+            result["vendor_name"] = names.get(str(result["vendor_id"])) or "Unknown"
+
+
+def flag_database_duplicates(processed_data: List[Dict[str, Any]]) -> None:
+    """
+    Mark results whose vendor + invoice number already exist in the database.
+    Uses one query for the whole batch instead of one per file.
+    
+    Args:
+        processed_data: Results from process_single_file, updated in place
+    """
+    candidates = []
+    for result in processed_data:
+        inv_df = result.get("invoice_df")
+        if (result.get("status") == "success" and result.get("vendor_id") and
+                inv_df is not None and not inv_df.empty and "invoice_number" in inv_df.columns):
+            pair = (str(result["vendor_id"]), str(inv_df.iloc[0]["invoice_number"]))
+            candidates.append((result, pair))
+    
+    if not candidates:
+        return
+    
+    existing = find_duplicate_invoices([pair for _, pair in candidates])
+    for result, pair in candidates:
+        duplicate_id = existing.get(pair)
+        if duplicate_id:
+            result["is_duplicate"] = True
+            result["duplicate_id"] = duplicate_id
+            result["status"] = "duplicate"
+            result["message"] = f"Duplicate found: Invoice #{pair[1]} already exists"
+
+
 def generate_demo_data():
     """Generate dummy invoice data for demonstration."""
     from bson import ObjectId
@@ -332,6 +477,12 @@ def generate_demo_data():
     return demo_invoices
 
 
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_demo_data() -> List[Dict[str, Any]]:
+    """Demo templates, built once an hour; each call returns a fresh copy."""
+    return generate_demo_data()
+
+
 def render_main_menu():
     """Render the main menu with options to upload new or edit existing invoices."""
     st.title("📤 Invoice Upload & Management")
@@ -377,11 +528,14 @@ def render_manual_entry():
     st.divider()
     
     # Get all vendors for dropdown
-    vendors = get_all_vendors()
+    vendors = _cached_vendors()
     vendor_options = {v["name"]: str(v["_id"]) for v in vendors}
     
     if not vendor_options:
         st.error("⚠️ No vendors found in database. Please add vendors first in Database Admin page.")
+        if st.button("🔄 Refresh vendors"):
+            _cached_vendors.clear()
+            st.rerun()
         return
     
     # Invoice Header Section
@@ -426,6 +580,29 @@ def render_manual_entry():
     
     st.divider()
     
+    # Depends only on the header, so it is not repeated for line-item edits
+    duplicate_id = None
+    if invoice_number.strip():
+        duplicate_id = _cached_duplicate_id(vendor_id, invoice_number)
+    
+    render_manual_line_items(
+        vendor_id=vendor_id,
+        vendor_name=selected_vendor_name,
+        invoice_number=invoice_number,
+        invoice_date=invoice_date,
+        order_number=order_number,
+        filename=filename,
+        duplicate_id=duplicate_id
+    )
+
+
+@st.fragment
+def render_manual_line_items(vendor_id, vendor_name, invoice_number, invoice_date, order_number, filename, duplicate_id):
+    """
+    Line items editor, totals, validation and Save button for manual entry.
+    Runs as a fragment so editing a line item reruns only this block, not the
+    vendor lookup and header inputs above it.
+    """
     # Line Items Section
     st.markdown("### 📦 Line Items")
     st.markdown("Add items to the invoice. Total amount will be calculated automatically.")
@@ -485,15 +662,20 @@ def render_manual_entry():
         }
     )
     
-    # Calculate line totals
-    edited_df["line_total"] = edited_df["quantity"] * edited_df["unit_price"]
+    # Line totals, invoice total and validation flags in one pass over the ndarrays
+    line_totals = (
+        edited_df["quantity"].to_numpy(dtype=float, na_value=np.nan)
+        * edited_df["unit_price"].to_numpy(dtype=float, na_value=np.nan)
+    )
+    edited_df["line_total"] = line_totals
+    total_amount = float(np.nansum(line_totals))
+    n_rows = len(line_totals)
+    descs = edited_df["description"].to_numpy()
+    missing_description = bool((pd.isna(descs) | (np.char.strip(descs.astype(str)) == "")).any())
     
     # Update session state
     st.session_state.manual_line_items = edited_df.to_dict('records')
     
-    # Calculate total
-    total_amount = edited_df["line_total"].sum()
-    
     st.divider()
     
     # Summary and Save Section
@@ -501,7 +683,7 @@ def render_manual_entry():
     
     with col1:
         st.metric("💰 Total Amount", f"${total_amount:,.2f}")
-        st.metric("📦 Line Items", len(edited_df))
+        st.metric("📦 Line Items", n_rows)
     
     with col3:
         st.markdown("###")  # Spacer
@@ -514,21 +696,18 @@ def render_manual_entry():
             can_save = False
             validation_messages.append("⚠️ Invoice number is required")
         
-        if len(edited_df) == 0:
+        if n_rows == 0:
             can_save = False
             validation_messages.append("⚠️ At least one line item is required")
         
-        # Check for empty descriptions
-        if edited_df["description"].str.strip().eq("").any():
+        if missing_description:
             can_save = False
             validation_messages.append("⚠️ All line items must have descriptions")
         
-        # Check for duplicates
-        if can_save:
-            duplicate_doc = check_duplicate_invoice(vendor_id, invoice_number)
-            if duplicate_doc:
-                st.warning(f"⚠️ Duplicate found: Invoice #{invoice_number} for this vendor already exists (ID: {duplicate_doc['_id']})")
-                st.info("💡 You can still save this invoice, but it will be marked as a duplicate.")
+        # Duplicate lookup happens outside the fragment (header fields only)
+        if can_save and duplicate_id:
+            st.warning(f"⚠️ Duplicate found: Invoice #{invoice_number} for this vendor already exists (ID: {duplicate_id})")
+            st.info("💡 You can still save this invoice, but it will be marked as a duplicate.")
         
         # Display validation errors
         if validation_messages:
@@ -539,7 +718,7 @@ def render_manual_entry():
         if st.button("💾 Save Invoice", type="primary", disabled=not can_save, use_container_width=True):
             save_manual_invoice(
                 vendor_id=vendor_id,
-                vendor_name=selected_vendor_name,
+                vendor_name=vendor_name,
                 invoice_number=invoice_number,
                 invoice_date=invoice_date,
                 order_number=order_number,
@@ -553,8 +732,7 @@ def save_manual_invoice(vendor_id, vendor_name, invoice_number, invoice_date, or
     """Save manually entered invoice to database."""
     try:
         # Get default restaurant_id from database
-        restaurant = db["restaurants"].find_one({}, {"_id": 1})
-        restaurant_id = str(restaurant["_id"]) if restaurant else "000000000000000000000000"
+        restaurant_id = get_default_restaurant_id()
         
         # Prepare invoice DataFrame with all required fields for save_inv_li_to_db
         invoice_data = {
@@ -581,6 +759,8 @@ def save_manual_invoice(vendor_id, vendor_name, invoice_number, invoice_date, or
         )
         
         if result["success"]:
+            # The saved invoice is now a duplicate of this header
+            _cached_duplicate_id.clear()
             st.success(f"✅ Invoice saved successfully! Invoice ID: {result['invoice_id']}")
             st.balloons()
             
@@ -608,6 +788,25 @@ def save_manual_invoice(vendor_id, vendor_name, invoice_number, invoice_date, or
         st.error(f"❌ Unexpected error: {str(e)}")
 
 
+# Browse page date presets (days back from today)
+DATE_PRESET_DAYS = {"Last 7 Days": 7, "Last 30 Days": 30, "Last 90 Days": 90}
+
+
+@lru_cache(maxsize=16)
+def _preset_range(preset: str, today: date) -> Optional[Tuple[datetime, datetime]]:
+    """
+    Return the (start, end) invoice_date bounds for a preset, or None for All Time.
+    Keyed on today's date so cached ranges roll over at midnight.
+    """
+    days = DATE_PRESET_DAYS.get(preset)
+    if days is None:
+        return None
+    return (
+        datetime.combine(today - timedelta(days=days), datetime.min.time()),
+        datetime.combine(today, datetime.max.time())
+    )
+
+
 def render_browse_invoices():
     """Render the interface to browse and edit saved invoices from database."""
     st.title("📝 Browse & Edit Saved Invoices")
@@ -641,49 +840,76 @@ def render_browse_invoices():
         if date_preset == "Custom Range":
             start_date = st.date_input("Start Date", value=datetime.now() - timedelta(days=30))
             end_date = st.date_input("End Date", value=datetime.now())
-        elif date_preset == "Last 7 Days":
-            start_date = datetime.now() - timedelta(days=7)
-            end_date = datetime.now()
-        elif date_preset == "Last 30 Days":
-            start_date = datetime.now() - timedelta(days=30)
-            end_date = datetime.now()
-        elif date_preset == "Last 90 Days":
-            start_date = datetime.now() - timedelta(days=90)
-            end_date = datetime.now()
-        else:  # All Time
-            start_date = None
-            end_date = None
+            date_range = (
+                datetime.combine(start_date, datetime.min.time()),
+                datetime.combine(end_date, datetime.max.time())
+            )
+        else:
+            date_range = _preset_range(date_preset, date.today())
     
     with col2:
         # Vendor filter
-        vendors = get_all_vendors()
+        vendors = _cached_vendors()
         vendor_names = ["All Vendors"] + [v["name"] for v in vendors]
         selected_vendor = st.selectbox("Vendor", vendor_names)
+        if st.button("🔄 Refresh vendors", help="Reload the vendor list from the database"):
+            _cached_vendors.clear()
+            st.rerun()
         
         if selected_vendor != "All Vendors":
-            vendor_id = next((str(v["_id"]) for v in vendors if v["name"] == selected_vendor), None)
+            # Cached vendor documents already hold the ObjectId
+            vendor_oid = next((v["_id"] for v in vendors if v["name"] == selected_vendor), None)
         else:
-            vendor_id = None
+            vendor_oid = None
     
     with col3:
         # Invoice number search
-        invoice_search = st.text_input("Invoice Number (contains)", "")
+        invoice_search = st.text_input(
+            "Invoice Number (starts with)",
+            "",
+            help="Matches invoice numbers that begin with this text"
+        )
     
     # Build query
     query = {}
-    if start_date and end_date:
-        query["invoice_date"] = {
-            "$gte": datetime.combine(start_date, datetime.min.time()),
-            "$lte": datetime.combine(end_date, datetime.max.time())
-        }
-    if vendor_id:
-        query["vendor_id"] = ObjectId(vendor_id)
+    if date_range:
+        query["invoice_date"] = {"$gte": date_range[0], "$lte": date_range[1]}
+    if vendor_oid:
+        query["vendor_id"] = vendor_oid
     if invoice_search:
-        query["invoice_number"] = {"$regex": invoice_search, "$options": "i"}
+        # Anchored, case-sensitive prefixes become index range scans on invoice_number;
+        # the upper/lower variants cover the usual casing without a case-insensitive scan
+        prefixes = dict.fromkeys([invoice_search, invoice_search.upper(), invoice_search.lower()])
+        query["invoice_number"] = {"$in": [re.compile("^" + re.escape(prefix)) for prefix in prefixes]}
     
     # Execute search
     try:
-        invoices = list(db.invoices.find(query).sort("invoice_date", -1).limit(100))
+        # One round-trip: vendor names are joined server-side for the 100 rows shown
+        invoices = list(db.invoices.aggregate([
+            {"$match": query},
+            {"$sort": {"invoice_date": -1}},
+            {"$limit": 100},
+            {
+                "$lookup": {
+                    "from": "vendors",
+                    "localField": "vendor_id",
+                    "foreignField": "_id",
+                    "as": "vendor"
+                }
+            },
+            # Only the columns shown in the table go over the wire
+            {
+                "$project": {
+                    "invoice_number": 1,
+                    "invoice_date": 1,
+                    # Decimal128 -> double on the server, so no per-row conversion here
+                    "invoice_total_amount": {
+                        "$convert": {"input": "$invoice_total_amount", "to": "double", "onError": 0.0, "onNull": 0.0}
+                    },
+                    "vendor_name": {"$ifNull": [{"$first": "$vendor.name"}, "Unknown"]}
+                }
+            }
+        ]))
         
         if not invoices:
             st.info("No invoices found matching the filters.")
@@ -692,28 +918,20 @@ def render_browse_invoices():
         # Display results
         st.markdown(f"### 📊 Found {len(invoices)} invoice(s)")
         
-        # Create display dataframe
-        display_data = []
-        for inv in invoices:
-            # Get vendor name
-            vendor = db.vendors.find_one({"_id": inv.get("vendor_id")})
-            vendor_name = vendor["name"] if vendor else "Unknown"
-            
-            # Convert Decimal128 to float
-            total_amount = inv.get("invoice_total_amount", 0)
-            if isinstance(total_amount, Decimal128):
-                total_amount = float(total_amount.to_decimal())
-            
-            display_data.append({
-                "Select": False,
-                "Invoice #": inv.get("invoice_number", ""),
-                "Date": inv.get("invoice_date", "").strftime("%Y-%m-%d") if isinstance(inv.get("invoice_date"), datetime) else str(inv.get("invoice_date", "")),
-                "Vendor": vendor_name,
-                "Total": f"${total_amount:,.2f}",
-                "_id": str(inv["_id"])
-            })
-        
-        results_df = pd.DataFrame(display_data)
+        # Create display dataframe column-wise from the result documents
+        raw_df = pd.DataFrame.from_records(
+            invoices,
+            columns=["_id", "invoice_number", "invoice_date", "vendor_name", "invoice_total_amount"]
+        )
+        totals = pd.to_numeric(raw_df["invoice_total_amount"], errors="coerce").fillna(0.0)
+        results_df = pd.DataFrame({
+            "Select": False,
+            "Invoice #": raw_df["invoice_number"].fillna(""),
+            "Date": pd.to_datetime(raw_df["invoice_date"], errors="coerce").dt.strftime("%Y-%m-%d").fillna(""),
+            "Vendor": raw_df["vendor_name"],
+            "Total": totals.map("${:,.2f}".format),
+            "_id": raw_df["_id"].astype(str)
+        })
         
         # Show dataframe with selection
         edited_df = st.data_editor(
@@ -757,14 +975,15 @@ def render_browse_invoices():
                 col_a, col_b = st.columns(2)
                 with col_a:
                     if st.button("✅ Yes, Delete", type="primary", use_container_width=True):
-                        # Delete line items first
-                        db.line_items.delete_many({"invoice_id": ObjectId(selected_id)})
-                        # Delete invoice
-                        db.invoices.delete_one({"_id": ObjectId(selected_id)})
+                        result = delete_invoice(selected_id)
                         
-                        st.success(f"✅ Invoice deleted successfully (including {line_item_count} line items)")
-                        del st.session_state.confirm_delete_id
-                        st.rerun()
+                        if result["success"]:
+                            _fetch_invoice_and_vendor.clear()
+                            st.success(f"✅ Invoice deleted successfully (including {result['deleted_line_items']} line items)")
+                            del st.session_state.confirm_delete_id
+                            st.rerun()
+                        else:
+                            st.error(f"❌ {result['message']}")
                 
                 with col_b:
                     if st.button("❌ Cancel", use_container_width=True):
@@ -776,11 +995,13 @@ def render_browse_invoices():
         col1, col2 = st.columns([3, 1])
         with col2:
             if st.button("📥 Export to CSV", use_container_width=True):
-                export_df = results_df.drop(columns=["Select", "_id"])
-                csv = export_df.to_csv(index=False)
+                # Select the visible columns (no drop copy) and write bytes straight to a buffer
+                export_df = results_df[["Invoice #", "Date", "Vendor", "Total"]]
+                buf = io.BytesIO()
+                export_df.to_csv(buf, index=False, encoding="utf-8")
                 st.download_button(
                     label="💾 Download CSV",
-                    data=csv,
+                    data=buf.getvalue(),
                     file_name=f"invoices_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                     mime="text/csv",
                     use_container_width=True
@@ -790,52 +1011,98 @@ def render_browse_invoices():
         st.error(f"Error searching invoices: {str(e)}")
 
 
+def _empty_line_items_df() -> pd.DataFrame:
+    """Blank line items table with numeric columns already typed as float64."""
+    return pd.DataFrame({
+        "description": np.empty(0, dtype=object),
+        "quantity": np.empty(0, dtype=np.float64),
+        "unit": np.empty(0, dtype=object),
+        "unit_price": np.empty(0, dtype=np.float64),
+        "line_total": np.empty(0, dtype=np.float64)
+    })
+
+
+def _to_float(value) -> float:
+    """Decimal128 / number / None -> float (class identity check, no isinstance MRO walk)."""
+    if value.__class__ is Decimal128:
+        return float(value.to_decimal())
+    return float(value or 0.0)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _fetch_invoice_and_vendor(invoice_id: str) -> Optional[Tuple[Dict[str, Any], Dict[str, list]]]:
+    """
+    Fetch an invoice, its vendor name and its line items as plain Python data (Decimal128 -> float).
+    Cleared after every edit made from the saved invoice editor.
+    
+    Returns:
+        (invoice header dict, line item columns {name: values}), or None if the invoice doesn't exist
+    """
+    invoice = get_invoice_by_id(invoice_id, fields=EDITOR_INVOICE_FIELDS, line_item_fields=EDITOR_LINE_ITEM_FIELDS)
+    if not invoice:
+        return None
+    
+    inv_data = {
+        "invoice_number": invoice.get("invoice_number", ""),
+        "invoice_date": invoice.get("invoice_date", datetime.now()),
+        "invoice_total_amount": _to_float(invoice.get("invoice_total_amount")),
+        "order_number": invoice.get("order_number", ""),
+        "vendor_id": str(invoice.get("vendor_id", ""))
+    }
+    
+    # Get vendor name (name-only projection)
+    inv_data["vendor_name"] = get_vendor_name_by_id(inv_data["vendor_id"]) or "Unknown"
+    
+    # Load line items column-wise: one preallocated list per column, filled in one pass
+    line_items = invoice.get("line_items", [])
+    n = len(line_items)
+    ids, line_numbers, descriptions, units = [None] * n, [None] * n, [None] * n, [None] * n
+    quantities, unit_prices, line_totals = [0.0] * n, [0.0] * n, [0.0] * n
+    for i, li in enumerate(line_items):
+        ids[i] = str(li["_id"])
+        line_numbers[i] = li.get("line_number", 0)
+        descriptions[i] = li.get("description", "")
+        quantities[i] = _to_float(li.get("quantity"))
+        units[i] = li.get("unit", "")
+        unit_prices[i] = _to_float(li.get("unit_price"))
+        line_totals[i] = _to_float(li.get("line_total"))
+    
+    li_columns = {
+        "_id": ids,
+        "line_number": line_numbers,
+        "description": descriptions,
+        "quantity": quantities,
+        "unit": units,
+        "unit_price": unit_prices,
+        "line_total": line_totals
+    }
+    return inv_data, li_columns
+
+
 def load_invoice_for_editing(invoice_id: str):
     """Load an invoice from database for editing."""
     try:
-        invoice = get_invoice_by_id(invoice_id)
+        fetched = _fetch_invoice_and_vendor(invoice_id)
         
-        if not invoice:
+        if not fetched:
             st.error("Invoice not found")
             return
         
-        # Convert to DataFrame format
-        inv_data = {
-            "invoice_number": invoice.get("invoice_number", ""),
-            "invoice_date": invoice.get("invoice_date", datetime.now()),
-            "invoice_total_amount": float(invoice.get("invoice_total_amount").to_decimal()) if isinstance(invoice.get("invoice_total_amount"), Decimal128) else invoice.get("invoice_total_amount", 0),
-            "order_number": invoice.get("order_number", ""),
-            "vendor_id": str(invoice.get("vendor_id", ""))
-        }
-        
-        # Get vendor name
-        vendor = db.vendors.find_one({"_id": invoice.get("vendor_id")})
-        inv_data["vendor_name"] = vendor["name"] if vendor else "Unknown"
-        
+        inv_data, li_columns = fetched
         inv_df = pd.DataFrame([inv_data])
-        
-        # Load line items
-        line_items = invoice.get("line_items", [])
-        li_data = []
-        for li in line_items:
-            li_data.append({
-                "_id": str(li["_id"]),
-                "line_number": li.get("line_number", 0),
-                "description": li.get("description", ""),
-                "quantity": float(li.get("quantity").to_decimal()) if isinstance(li.get("quantity"), Decimal128) else li.get("quantity", 0),
-                "unit": li.get("unit", ""),
-                "unit_price": float(li.get("unit_price").to_decimal()) if isinstance(li.get("unit_price"), Decimal128) else li.get("unit_price", 0),
-                "line_total": float(li.get("line_total").to_decimal()) if isinstance(li.get("line_total"), Decimal128) else li.get("line_total", 0)
+        if li_columns["_id"]:
+            li_df = pd.DataFrame({
+                col: np.asarray(values, dtype=np.float64) if col in ("quantity", "unit_price", "line_total") else values
+                for col, values in li_columns.items()
             })
-        
-        li_df = pd.DataFrame(li_data) if li_data else pd.DataFrame(columns=["description", "quantity", "unit", "unit_price", "line_total"])
+        else:
+            li_df = _empty_line_items_df()
         
         # Store in session state
         st.session_state.selected_invoice_id = invoice_id
         st.session_state.loaded_invoice_data = {
             "invoice_df": inv_df,
-            "line_items_df": li_df,
-            "original_invoice": invoice
+            "line_items_df": li_df
         }
         
     except Exception as e:
@@ -856,6 +1123,7 @@ def render_saved_invoice_editor():
     invoice_data = st.session_state.loaded_invoice_data
     inv_df = invoice_data["invoice_df"]
     li_df = invoice_data["line_items_df"]
+    inv_row = inv_df.iloc[0].to_dict()
     
     # Invoice header editing
     st.markdown("#### 📄 Invoice Details")
@@ -863,17 +1131,17 @@ def render_saved_invoice_editor():
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        new_inv_num = st.text_input("Invoice Number", value=inv_df.iloc[0]["invoice_number"])
+        new_inv_num = st.text_input("Invoice Number", value=inv_row["invoice_number"])
     with col2:
-        new_inv_date = st.date_input("Invoice Date", value=pd.to_datetime(inv_df.iloc[0]["invoice_date"]))
+        new_inv_date = st.date_input("Invoice Date", value=pd.to_datetime(inv_row["invoice_date"]))
     with col3:
-        new_total = st.number_input("Total Amount", value=float(inv_df.iloc[0]["invoice_total_amount"]), format="%.2f")
+        new_total = st.number_input("Total Amount", value=float(inv_row["invoice_total_amount"]), format="%.2f")
     
     col4, col5, col6 = st.columns(3)
     with col4:
-        new_order_num = st.text_input("Order Number", value=inv_df.iloc[0].get("order_number", ""))
+        new_order_num = st.text_input("Order Number", value=inv_row.get("order_number", ""))
     with col5:
-        st.metric("Vendor", inv_df.iloc[0]["vendor_name"])
+        st.metric("Vendor", inv_row["vendor_name"])
     
     # Update invoice button
     if st.button("💾 Update Invoice Header", type="primary"):
@@ -890,6 +1158,7 @@ def render_saved_invoice_editor():
             if result.get("success"):
                 st.success("✅ Invoice header updated successfully!")
                 # Reload the invoice
+                _fetch_invoice_and_vendor.clear()
                 load_invoice_for_editing(st.session_state.selected_invoice_id)
                 st.rerun()
             else:
@@ -909,15 +1178,7 @@ def render_saved_invoice_editor():
             num_rows="dynamic",
             use_container_width=True,
             hide_index=True,
-            column_config={
-                "_id": None,  # Hide ID column
-                "line_number": None,  # Hide line number
-                "description": st.column_config.TextColumn("Description", width="large"),
-                "quantity": st.column_config.NumberColumn("Quantity", format="%.2f"),
-                "unit": st.column_config.TextColumn("Unit"),
-                "unit_price": st.column_config.NumberColumn("Unit Price", format="$%.2f"),
-                "line_total": st.column_config.NumberColumn("Line Total", format="$%.2f")
-            },
+            column_config=SAVED_LINE_ITEM_COLUMN_CONFIG,
             key="edit_saved_line_items"
         )
         
@@ -927,37 +1188,44 @@ def render_saved_invoice_editor():
             if st.button("💾 Save Line Item Changes", type="primary", use_container_width=True):
                 try:
                     # Compare original and edited dataframes
-                    original_ids = set(li_df["_id"].tolist())
-                    edited_ids = set(edited_li_df["_id"].tolist() if "_id" in edited_li_df.columns else [])
+                    original_ids = frozenset(li_df["_id"].tolist())
+                    records = edited_li_df.to_dict(orient="records")
+                    edited_ids = {row.get("_id") for row in records}
                     
                     # Handle deletions
-                    deleted_ids = original_ids - edited_ids
-                    for li_id in deleted_ids:
-                        if li_id:  # Not empty string
-                            delete_line_item(li_id)
+                    deleted_ids = [li_id for li_id in original_ids - edited_ids if li_id]  # Skip empty strings
                     
-                    # Handle updates and additions
-                    for idx, row in edited_li_df.iterrows():
+                    # Handle updates and additions (plain dicts, no per-row Series)
+                    updates = []
+                    new_items = []
+                    for row in records:
                         li_data = {
                             "description": row["description"],
-                            "quantity": Decimal128(str(row["quantity"])),
+                            "quantity": row["quantity"],
                             "unit": row["unit"],
-                            "unit_price": Decimal128(str(row["unit_price"])),
-                            "line_total": Decimal128(str(row["line_total"]))
+                            "unit_price": row["unit_price"],
+                            "line_total": row["line_total"]
                         }
                         
-                        if "_id" in row and row["_id"] and row["_id"] in original_ids:
-                            # Update existing
-                            update_line_item(row["_id"], li_data)
+                        li_id = row.get("_id")
+                        if li_id and li_id in original_ids:
+                            updates.append((li_id, li_data))
                         else:
-                            # Add new - need to include invoice_id in li_data
-                            li_data["invoice_id"] = ObjectId(st.session_state.selected_invoice_id)
-                            add_line_item(st.session_state.selected_invoice_id, li_data)
+                            new_items.append(li_data)
                     
-                    st.success("✅ Line items updated successfully!")
-                    # Reload the invoice
-                    load_invoice_for_editing(st.session_state.selected_invoice_id)
-                    st.rerun()
+                    # All deletes, updates and inserts in one round trip
+                    result = save_line_item_changes(
+                        st.session_state.selected_invoice_id, deleted_ids, updates, new_items
+                    )
+                    
+                    if result["success"]:
+                        st.success("✅ Line items updated successfully!")
+                        # Reload the invoice
+                        _fetch_invoice_and_vendor.clear()
+                        load_invoice_for_editing(st.session_state.selected_invoice_id)
+                        st.rerun()
+                    else:
+                        st.error(f"Error updating line items: {result['message']}")
                     
                 except Exception as e:
                     st.error(f"Error updating line items: {str(e)}")
@@ -975,6 +1243,7 @@ def render_saved_invoice_editor():
                     result = add_line_item(st.session_state.selected_invoice_id, new_item)
                     if result.get("success"):
                         st.success("✅ New line item added!")
+                        _fetch_invoice_and_vendor.clear()
                         load_invoice_for_editing(st.session_state.selected_invoice_id)
                         st.rerun()
                 except Exception as e:
@@ -993,6 +1262,7 @@ def render_saved_invoice_editor():
                 result = add_line_item(st.session_state.selected_invoice_id, new_item)
                 if result.get("success"):
                     st.success("✅ First line item added!")
+                    _fetch_invoice_and_vendor.clear()
                     load_invoice_for_editing(st.session_state.selected_invoice_id)
                     st.rerun()
             except Exception as e:
@@ -1039,6 +1309,11 @@ def render_upload_section():
         help="Supported formats: PDF, PNG, JPG, JPEG (Max 255 files)"
     )
     
+    # Start loading the OCR model while the user reviews their selection; it
+    # stays resident for every later batch (the worker threads share it)
+    if uploaded_files and not demo_mode:
+        preload_ocr_router()
+    
     if uploaded_files:
         num_files = len(uploaded_files)
         
@@ -1054,7 +1329,7 @@ def render_upload_section():
             if demo_mode:
                 with st.spinner("Generating demo data..."):
                     # Generate demo data based on number of files
-                    demo_data = generate_demo_data()
+                    demo_data = _cached_demo_data()
                     
                     # Use only first 3 patterns (success, success, partial) - exclude duplicate pattern
                     demo_patterns = demo_data[:3]  # Exclude the duplicate demo
@@ -1064,6 +1339,9 @@ def render_upload_section():
                     for idx, uploaded_file in enumerate(uploaded_files):
                         # Cycle through demo data patterns (only non-duplicate ones)
                         demo_template = demo_patterns[idx % len(demo_patterns)].copy()
+                        # Files sharing a pattern need their own DataFrames
+                        demo_template["invoice_df"] = demo_template["invoice_df"].copy()
+                        demo_template["line_items_df"] = demo_template["line_items_df"].copy()
                         demo_template["filename"] = uploaded_file.name
                         demo_template["invoice_df"]["filename"] = [uploaded_file.name]
                         # Generate unique invoice numbers to avoid false duplicates
@@ -1088,17 +1366,34 @@ def render_upload_section():
                     progress_bar = st.progress(0)
                     status_text = st.empty()
                     
-                    processed_data = []
+                    # Files are independent, so extract them concurrently (OCR and
+                    # LLM calls release the GIL). Each file gets its own directory
+                    # so uploads sharing a name can't overwrite each other.
+                    restaurant_id = get_default_restaurant_id()
+                    processed_data = [None] * num_files
+                    done = 0
+                    with ThreadPoolExecutor(max_workers=min(UPLOAD_WORKERS, num_files)) as ex:
+                        futures = {}
+                        for idx, uploaded_file in enumerate(uploaded_files):
+                            file_dir = temp_dir / str(idx)
+                            file_dir.mkdir(parents=True, exist_ok=True)
+                            futures[ex.submit(process_single_file, uploaded_file, file_dir, restaurant_id)] = idx
+                        
+                        for fut in as_completed(futures):
+                            idx = futures[fut]
+                            processed_data[idx] = fut.result()
+                            done += 1
+                            status_text.text(f"Processed {done}/{num_files}: {uploaded_files[idx].name}")
+                            progress_bar.progress(done / num_files)
                     
-                    # Track invoice signatures within current batch to detect duplicates
-                    seen_invoices = set()
+                    # One round trip each for vendor names and database duplicates
+                    fill_vendor_names(processed_data)
+                    flag_database_duplicates(processed_data)
                     
-                    for idx, uploaded_file in enumerate(uploaded_files):
-                        status_text.text(f"Processing {idx + 1}/{num_files}: {uploaded_file.name}")
-                        
-                        result = process_single_file(uploaded_file, temp_dir)
-                        
-                        # Check for duplicates WITHIN this batch (in addition to DB check)
+                    # Check for duplicates WITHIN this batch (in addition to DB check),
+                    # in upload order so the first copy is the one kept
+                    seen_invoices = set()
+                    for result in processed_data:
                         if (result.get("vendor_id") and 
                             result.get("invoice_df") is not None and 
                             not result["invoice_df"].empty and
@@ -1113,10 +1408,6 @@ def render_upload_section():
                                 result["message"] = f"Duplicate in batch: Invoice #{inv_num} already in this upload"
                             elif inv_num:  # Only track if invoice number exists
                                 seen_invoices.add(signature)
-                        
-                        processed_data.append(result)
-                        
-                        progress_bar.progress((idx + 1) / num_files)
                     
                     # Store in session state
                     st.session_state.uploaded_files_data = processed_data
@@ -1127,11 +1418,14 @@ def render_upload_section():
                     save_session_to_db()
                     
                     # Clean up temp files
-                    for file in temp_dir.glob("*"):
+                    for path in temp_dir.glob("*"):
                         try:
-                            file.unlink()
+                            if path.is_dir():
+                                shutil.rmtree(path)
+                            else:
+                                path.unlink()
                         except OSError as e:
-                            logger.warning(f"Could not delete temp file {file}: {e}")
+                            logger.warning(f"Could not delete temp file {path}: {e}")
                     
                     status_text.text("✅ Processing complete!")
                     progress_bar.empty()
@@ -1147,14 +1441,7 @@ def render_invoice_editor(invoice_data: Dict[str, Any], idx: int):
     
     # Status badge
     status = invoice_data.get("status", "unknown")
-    status_colors = {
-        "success": "🟢",
-        "partial": "🟡",
-        "duplicate": "🟠",
-        "failed": "🔴"
-    }
-    
-    status_icon = status_colors.get(status, "⚪")
+    status_icon = STATUS_ICONS.get(status, "⚪")
     
     with st.expander(
         f"{status_icon} {invoice_data['filename']} - {invoice_data.get('message', '')}",
@@ -1168,12 +1455,7 @@ def render_invoice_editor(invoice_data: Dict[str, Any], idx: int):
             col1, col2 = st.columns(2)
             with col1:
                 st.markdown("**Possible causes:**")
-                st.markdown("""
-                - File is corrupted or unreadable
-                - Image quality too poor for OCR
-                - Unsupported file format
-                - File contains no readable text
-                """)
+                st.markdown(FAILED_EXTRACTION_CAUSES)
             
             with col2:
                 st.markdown("**Actions:**")
@@ -1194,9 +1476,7 @@ def render_invoice_editor(invoice_data: Dict[str, Any], idx: int):
                         "text_length": [0],
                         "page_count": [1]
                     })
-                    invoice_data["line_items_df"] = pd.DataFrame(columns=[
-                        "description", "quantity", "unit", "unit_price", "line_total"
-                    ])
+                    invoice_data["line_items_df"] = _empty_line_items_df()
                     invoice_data["status"] = "partial"
                     invoice_data["message"] = "Manual entry mode"
                     save_session_to_db()
@@ -1215,6 +1495,9 @@ def render_invoice_editor(invoice_data: Dict[str, Any], idx: int):
             
             return
         
+        # Read header fields from a plain dict; writes still go through invoice_df.loc
+        row0 = invoice_df.iloc[0].to_dict()
+        
         # Action buttons row
         col1, col2, col3, col4 = st.columns([2, 2, 2, 2])
         
@@ -1259,20 +1542,20 @@ def render_invoice_editor(invoice_data: Dict[str, Any], idx: int):
             with col1:
                 invoice_df.loc[0, "invoice_number"] = st.text_input(
                     "Invoice Number",
-                    value=str(invoice_df.iloc[0]["invoice_number"]),
+                    value=str(row0["invoice_number"]),
                     key=f"inv_num_{idx}"
                 )
                 
                 invoice_df.loc[0, "invoice_date"] = st.date_input(
                     "Invoice Date",
-                    value=pd.to_datetime(invoice_df.iloc[0]["invoice_date"]),
+                    value=pd.to_datetime(row0["invoice_date"]),
                     key=f"inv_date_{idx}"
                 )
             
             with col2:
                 invoice_df.loc[0, "invoice_total_amount"] = st.number_input(
                     "Total Amount",
-                    value=float(invoice_df.iloc[0]["invoice_total_amount"]),
+                    value=float(row0["invoice_total_amount"]),
                     min_value=0.0,
                     step=0.01,
                     format="%.2f",
@@ -1281,7 +1564,7 @@ def render_invoice_editor(invoice_data: Dict[str, Any], idx: int):
                 
                 invoice_df.loc[0, "vendor_name"] = st.text_input(
                     "Vendor Name",
-                    value=str(invoice_df.iloc[0].get("vendor_name", invoice_data.get("vendor_name", ""))),
+                    value=str(row0.get("vendor_name", invoice_data.get("vendor_name", ""))),
                     key=f"vendor_{idx}"
                 )
             
@@ -1292,17 +1575,17 @@ def render_invoice_editor(invoice_data: Dict[str, Any], idx: int):
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
-                inv_num = invoice_df.iloc[0].get("invoice_number", "N/A")
+                inv_num = row0.get("invoice_number", "N/A")
                 st.metric("Invoice Number", inv_num if inv_num else "N/A")
             with col2:
                 try:
-                    inv_date = pd.to_datetime(invoice_df.iloc[0]["invoice_date"]).strftime("%Y-%m-%d")
+                    inv_date = pd.to_datetime(row0["invoice_date"]).strftime("%Y-%m-%d")
                 except (ValueError, KeyError, TypeError) as e:
                     logger.debug(f"Could not format invoice date: {e}")
                     inv_date = "N/A"
                 st.metric("Date", inv_date)
             with col3:
-                total_amt = invoice_df.iloc[0].get("invoice_total_amount")
+                total_amt = row0.get("invoice_total_amount")
                 if total_amt is not None and total_amt != "":
                     try:
                         total_display = f"${float(total_amt):,.2f}"
@@ -1325,13 +1608,7 @@ def render_invoice_editor(invoice_data: Dict[str, Any], idx: int):
                     num_rows="dynamic",
                     use_container_width=True,
                     key=f"line_items_{idx}",
-                    column_config={
-                        "description": st.column_config.TextColumn("Description", width="large"),
-                        "quantity": st.column_config.NumberColumn("Quantity", format="%.2f"),
-                        "unit": st.column_config.TextColumn("Unit"),
-                        "unit_price": st.column_config.NumberColumn("Unit Price", format="$%.2f"),
-                        "line_total": st.column_config.NumberColumn("Line Total", format="$%.2f")
-                    }
+                    column_config=LINE_ITEM_COLUMN_CONFIG
                 )
                 invoice_data["line_items_df"] = edited_df
             else:
@@ -1348,20 +1625,20 @@ def render_invoice_editor(invoice_data: Dict[str, Any], idx: int):
             
             if st.session_state.edit_mode.get(f"edit_{idx}", False):
                 if st.button("➕ Add Line Item", key=f"add_line_{idx}"):
-                    new_row = pd.DataFrame({
-                        "description": [""],
-                        "quantity": [0.0],
-                        "unit": [""],
-                        "unit_price": [0.0],
-                        "line_total": [0.0]
-                    })
-                    if invoice_data["line_items_df"] is None or invoice_data["line_items_df"].empty:
-                        invoice_data["line_items_df"] = new_row
-                    else:
-                        invoice_data["line_items_df"] = pd.concat(
-                            [invoice_data["line_items_df"], new_row],
-                            ignore_index=True
-                        )
+                    new_row = {
+                        "description": "",
+                        "quantity": 0.0,
+                        "unit": "",
+                        "unit_price": 0.0,
+                        "line_total": 0.0
+                    }
+                    if invoice_data["line_items_df"] is None:
+                        invoice_data["line_items_df"] = _empty_line_items_df()
+                    # Append in place rather than concat-copying the whole table. The
+                    # editor can leave index gaps after deletions, so use max + 1, not len()
+                    li_df = invoice_data["line_items_df"]
+                    next_label = int(li_df.index.max()) + 1 if len(li_df) else 0
+                    li_df.loc[next_label] = new_row
                     st.rerun()
         
         # Extracted text (collapsible)
@@ -1387,12 +1664,17 @@ def render_review_section():
             st.rerun()
         return
     
-    # Summary metrics
+    # Summary metrics (one pass over the batch)
     total_invoices = len(st.session_state.uploaded_files_data)
-    successful = sum(1 for inv in st.session_state.uploaded_files_data if inv["status"] == "success")
-    duplicates = sum(1 for inv in st.session_state.uploaded_files_data if inv["is_duplicate"])
-    failed = sum(1 for inv in st.session_state.uploaded_files_data if inv["status"] == "failed")
-    partial = sum(1 for inv in st.session_state.uploaded_files_data if inv["status"] == "partial")
+    status_counts = Counter()
+    duplicates = 0
+    for inv in st.session_state.uploaded_files_data:
+        status_counts[inv["status"]] += 1
+        if inv["is_duplicate"]:
+            duplicates += 1
+    successful = status_counts["success"]
+    failed = status_counts["failed"]
+    partial = status_counts["partial"]
     
     col1, col2, col3, col4, col5 = st.columns(5)
     col1.metric("Total", total_invoices)
@@ -1439,11 +1721,12 @@ def render_save_section():
     status_text = st.empty()
     
     results = []
+    to_save = []
     invoices_to_save = st.session_state.uploaded_files_data
     total = len(invoices_to_save)
     
     for idx, invoice_data in enumerate(invoices_to_save):
-        status_text.text(f"Saving {idx + 1}/{total}: {invoice_data['filename']}")
+        status_text.text(f"Preparing {idx + 1}/{total}: {invoice_data['filename']}")
         
         # Handle duplicates
         if invoice_data.get("is_duplicate"):
@@ -1474,33 +1757,47 @@ def render_save_section():
             progress_bar.progress((idx + 1) / total)
             continue
         
-        # Save to database
+        # Queue for the batch insert below
+        to_save.append(invoice_data)
+        progress_bar.progress((idx + 1) / total)
+    
+    # Save everything with one insert per collection
+    if to_save:
+        status_text.text(f"Writing {len(to_save)} invoices to the database...")
         try:
-            result = save_inv_li_to_db(
-                invoice_data["invoice_df"],
-                invoice_data["line_items_df"]
+            batch_result = save_inv_li_batch(
+                [inv["invoice_df"] for inv in to_save],
+                [inv["line_items_df"] for inv in to_save]
             )
-            
-            if result and isinstance(result, dict):
-                results.append({
-                    "filename": invoice_data["filename"],
-                    "status": "saved" if result.get("success") else "error",
-                    "message": result.get("message", "Unknown result")
-                })
-            else:
+            batch_errors = batch_result.get("errors", {})
+            # Invoices that went in but whose line items did not
+            line_items_failed = set(batch_result.get("line_items_failed", []))
+            for pos, invoice_data in enumerate(to_save):
+                if pos in line_items_failed:
+                    results.append({
+                        "filename": invoice_data["filename"],
+                        "status": "error",
+                        "message": "Invoice saved but its line items were not: " + batch_result.get("message", "")
+                    })
+                elif pos in batch_errors:
+                    results.append({
+                        "filename": invoice_data["filename"],
+                        "status": "error",
+                        "message": batch_errors[pos]
+                    })
+                else:
+                    results.append({
+                        "filename": invoice_data["filename"],
+                        "status": "saved",
+                        "message": "Invoice saved successfully"
+                    })
+        except Exception as e:
+            for invoice_data in to_save:
                 results.append({
                     "filename": invoice_data["filename"],
                     "status": "error",
-                    "message": "Save function returned no result"
+                    "message": f"Error: {str(e)}"
                 })
-        except Exception as e:
-            results.append({
-                "filename": invoice_data["filename"],
-                "status": "error",
-                "message": f"Error: {str(e)}"
-            })
-        
-        progress_bar.progress((idx + 1) / total)
     
     # Clear progress indicators
     progress_bar.empty()
@@ -1527,6 +1824,8 @@ def render_save_section():
     # Clean up session
     delete_temp_upload(st.session_state.session_id)
     st.session_state.save_complete = True
+    # Extraction may have registered new vendors
+    _cached_vendors.clear()
     
     # Action buttons
     col1, col2, col3 = st.columns(3)
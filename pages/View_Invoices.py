@@ -148,7 +148,8 @@ def render_filters():
     selected_vendor = st.sidebar.selectbox("Select Vendor", vendor_names)
     
     if selected_vendor != "All Vendors":
-        vendor_doc = db["vendors"].find_one({"name": selected_vendor})
+        # The vendor list above already carries each _id
+        vendor_doc = next((v for v in vendors if v["name"] == selected_vendor), None)
         if vendor_doc:
             filters["vendor_id"] = vendor_doc["_id"]
     
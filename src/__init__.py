@@ -1,13 +1,20 @@
 # Root package initializer
 from .extraction import process_files_to_processed_folder, process_invoice
-from .storage import start_connection, save_inv_li_to_db
-from .processing import get_structured_data_from_text
+from .storage import start_connection, save_inv_li_to_db, save_inv_li_batch
+from .processing import get_structured_data_from_text, file_sha256, make_extraction_key, get_cached_extraction, put_cached_extraction, get_cached_text, put_cached_text
 
 
 __all__ = [
     "process_files_to_processed_folder",
     "process_invoice",
     "get_structured_data_from_text",
+    "file_sha256",
+    "make_extraction_key",
+    "get_cached_extraction",
+    "put_cached_extraction",
+    "get_cached_text",
+    "put_cached_text",
     "start_connection",
     "save_inv_li_to_db",
+    "save_inv_li_batch",
 ]
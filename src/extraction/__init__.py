@@ -1,11 +1,12 @@
 from .regularize_file import process_files_to_processed_folder
 from .pdf_processor import extract_text_from_pdf
-from .ocr_processor import extract_text_from_ocr
+from .ocr_processor import extract_text_from_ocr, preload_ocr_router
 from .invoice_extractor import process_invoice
 
 __all__ = [
     "process_files_to_processed_folder",
     "extract_text_from_pdf",
     "extract_text_from_ocr",
+    "preload_ocr_router",
     "process_invoice",
 ]
@@ -1,6 +1,6 @@
-import easyocr
 import os
 import sys
+import threading
 from pathlib import Path
 from typing import Tuple, Optional
 import cv2
@@ -72,7 +72,7 @@ class OCRRouter:
     """
     
     def __init__(self):
-        """Initialize OCR engines (EasyOCR loads on startup)."""
+        """Initialize OCR engines (EasyOCR loads on construction)."""
         self.easyocr_reader = self._initialize_easyocr()
         self.routing_stats = {'easyocr': 0}
     
@@ -82,6 +82,9 @@ class OCRRouter:
         First call loads model (~100MB) - this happens once at startup.
         """
         try:
+            # easyocr pulls in torch, so only import it when a reader is needed
+            import easyocr
+
             if CONFIG['enable_logging']:
                 print("Loading EasyOCR model...")
             
@@ -158,7 +161,33 @@ class OCRRouter:
             print(f"  Total:             {total} images")
             print("="*60 + "\n")
 
-ocr_router_instance = OCRRouter()
+_ocr_router_instance = None
+_ocr_router_lock = threading.Lock()
+
+
+def get_ocr_router() -> OCRRouter:
+    """
+    Return the shared OCRRouter, loading the EasyOCR model on first use.
+
+    Deferring this keeps importing the extraction package (e.g. from the
+    Streamlit pages) cheap until an image actually needs OCR.
+    """
+    global _ocr_router_instance
+    if _ocr_router_instance is None:
+        with _ocr_router_lock:
+            if _ocr_router_instance is None:
+                _ocr_router_instance = OCRRouter()
+    return _ocr_router_instance
+
+def preload_ocr_router() -> None:
+    """
+    Load the shared OCRRouter in a background thread, if it isn't loaded yet.
+
+    Lets the UI start the EasyOCR model load while the user is still choosing
+    files, instead of the first extraction waiting for it.
+    """
+    if _ocr_router_instance is None:
+        threading.Thread(target=get_ocr_router, name="ocr-preload", daemon=True).start()
 
 def extract_text_from_ocr(image_path: str) -> Optional[Tuple[str, str, int, int, str]]:
     """
@@ -177,7 +206,7 @@ def extract_text_from_ocr(image_path: str) -> Optional[Tuple[str, str, int, int,
         filename = Path(image_path).name
         extraction_timestamp = datetime.now().isoformat()
         
-        extracted_text, route = ocr_router_instance.route_image(image_path)
+        extracted_text, route = get_ocr_router().route_image(image_path)
         
         if route == "error":
             print(f"ERROR: OCR processing failed for {image_path}. Details: {extracted_text}")
@@ -26,11 +26,14 @@ def extract_text_from_pdf(file_path):
         reader = PdfReader(file_path)
         page_count = len(reader.pages)
 
-        # Iterate over each page and extract text
+        # Collect page texts and join once instead of re-copying the string per page
+        page_texts = []
         for page in reader.pages:
             text = page.extract_text()
             if text:
-                extracted_text += text + "\n" # Add a newline between pages
+                page_texts.append(text)
+        if page_texts:
+            extracted_text = "\n".join(page_texts) + "\n" # Add a newline between pages
 
     except FileNotFoundError:
         print(f"Error: The file '{file_path}' was not found.")
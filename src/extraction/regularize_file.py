@@ -1,21 +1,36 @@
 # regularize_file.py
 
 import os
+import errno
 import shutil
 import logging
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from PyPDF2 import PdfReader, PdfWriter
 from PyPDF2.generic import DictionaryObject, NameObject
 import re
 import pdfplumber
-from typing import Tuple, List, Optional
+from typing import Tuple, List, Optional, Dict, Callable
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
-STAGING_DIR = Path("data") / "staging_area"
+DATA_DIR = Path("data") / "my_files"
 PROCESSED_DIR = Path("data") / "processed_area"
 
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg"}
+
+# Threads used to link/copy pass-through files into PROCESSED_DIR.
+LINK_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Whether the input tree and PROCESSED_DIR can share hard links. Flipped to
+# False on the first cross-device failure so later files go straight to copying.
+_SAME_FS = True
+
+# shutil's read/write buffer on Windows (where copyfile has no sendfile fast
+# path) is too small for NAS/SSD-backed invoice stores; used while copying.
+WINDOWS_COPY_BUFSIZE = 16 * 1024 * 1024
+
 
 def detect_invoice_page_groups(p: str, reader: pdfplumber.PDF) -> Tuple[Tuple[int, ...], ...]:
     """
@@ -161,7 +176,7 @@ def detect_invoice_page_groups(p: str, reader: pdfplumber.PDF) -> Tuple[Tuple[in
     return tuple(grouped_invoices)
 
 
-def split_pdf_by_page_groups(p, reader, groups):
+def split_pdf_by_page_groups(p, reader, groups, base_name=None, remove_original=True):
     """
     Split a multi-page PDF into files according to `groups`.
 
@@ -176,14 +191,20 @@ def split_pdf_by_page_groups(p, reader, groups):
     - Attempts to preserve the original /Info metadata dictionary.
     - Writes to a temporary `.tmp-{filename}` then atomically replaces the final file.
     - Collects created files and on exception cleans them up and keeps the original PDF.
-    - On full success removes the original PDF (`p.unlink()`).
+    - On full success removes the original PDF (`p.unlink()`) if `remove_original`.
 
     Parameters:
     - p: Path object for the original PDF.
     - reader: PdfReader for the original PDF.
     - groups: tuple of tuples with 1-based page indices.
+    - base_name: output filename stem; defaults to `p.stem`.
+    - remove_original: delete `p` once every group has been written.
+
+    Returns:
+    - List of Paths written to PROCESSED_DIR.
     """
-    base_name = p.stem
+    if base_name is None:
+        base_name = p.stem
 
     # fetch original /Info (may be an IndirectObject)
     orig_info_obj = reader.trailer.get("/Info")
@@ -247,7 +268,10 @@ def split_pdf_by_page_groups(p, reader, groups):
             created.append(final_path)
 
         # all groups created successfully, remove original
-        p.unlink()
+        if remove_original:
+            p.unlink()
+
+        return created
 
     except Exception as exc:
         # cleanup partial outputs and keep original
@@ -260,7 +284,7 @@ def split_pdf_by_page_groups(p, reader, groups):
         raise  # Re-raise to propagate the error
 
 
-def process_multi_page_pdf(p, reader):
+def process_multi_page_pdf(p, reader, base_name=None, remove_original=True):
     """
     Top-level multi-page PDF processor.
 
@@ -274,6 +298,10 @@ def process_multi_page_pdf(p, reader):
     Parameters:
     - p: pathlib.Path to the PDF file.
     - reader: PdfReader for the PDF.
+    - base_name, remove_original: forwarded to `split_pdf_by_page_groups`.
+
+    Returns:
+    - List of Paths written to PROCESSED_DIR (empty if nothing was split).
     """
     # Determine groups of pages that constitute individual invoices.
     groups = detect_invoice_page_groups(p, reader)
@@ -281,7 +309,7 @@ def process_multi_page_pdf(p, reader):
     # If detector returns falsy (None or empty), assume another mechanism handled it.
     if not groups:
         # If False or empty, assume the PDF has already been handled on its own.
-        return
+        return []
 
     # Validate groups are a tuple of tuples of positive integers and within range.
     # This guards against infinite loops and accidental bad detector outputs.
@@ -311,29 +339,131 @@ def process_multi_page_pdf(p, reader):
     groups = tuple(validated_groups)
 
     # Finally, split according to groups.
-    split_pdf_by_page_groups(p, reader, groups)
+    return split_pdf_by_page_groups(p, reader, groups, base_name=base_name, remove_original=remove_original)
 
 
 
 
-def process_files_to_processed_folder():
+def _walk_files(root):
+    """
+    Yield an os.DirEntry for every regular file below `root`.
+
+    Uses os.scandir directly so the file-type check comes from the cached
+    directory entry instead of an extra stat per path.
+    """
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+def _link_or_copy(src: str, dest: str):
+    """
+    Place `src` at `dest` without modifying `src`, replacing any existing `dest`.
+
+    Hard-links when possible (a single metadata update) and falls back to a
+    real copy across devices. Nothing downstream writes into processed files,
+    so sharing the inode with the input file is safe. Paths are plain strings
+    to keep pathlib overhead out of the per-file loop.
+    """
+    global _SAME_FS
+
+    dest_dir, dest_name = os.path.split(dest)
+    temp_path = os.path.join(dest_dir, f".tmp-{dest_name}")
+    try:
+        os.unlink(temp_path)
+    except FileNotFoundError:
+        pass
 
-    for p in STAGING_DIR.iterdir():
-        if p.is_dir():
+    linked = False
+    if _SAME_FS:
+        try:
+            os.link(src, temp_path)
+            linked = True
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            _SAME_FS = False
+
+    if not linked:
+        # Contents only: nothing downstream reads the processed file's mtime/mode
+        shutil.copyfile(src, temp_path)
+
+    os.replace(temp_path, dest)
+
+
+def process_files_to_processed_folder(
+    input_dir: Path = DATA_DIR,
+    skip: Optional[Callable[[os.DirEntry], bool]] = None
+) -> Dict[Path, List[Path]]:
+    """
+    Regularize every invoice file below `input_dir` straight into PROCESSED_DIR.
+
+    - Images and single-page PDFs are linked (or copied) across unchanged.
+    - Multi-page PDFs are split into one PDF per detected invoice.
+
+    Input files are never moved or deleted. Files sharing a basename get a
+    numbered `_dup{n}` suffix so they do not overwrite each other in PROCESSED_DIR.
+    Files for which `skip(entry)` returns True are left out entirely.
+
+    Returns:
+        Dict mapping each input file to the processed files it produced.
+    """
+    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+    processed_dir = str(PROCESSED_DIR)
+
+    outputs: Dict[Path, List[Path]] = {}
+    link_jobs = []
+    taken = set()
+    dup_counts: Dict[str, int] = {}
+
+    for entry in _walk_files(input_dir):
+        suffix = os.path.splitext(entry.name)[1].lower()
+        if suffix not in IMAGE_SUFFIXES and suffix != ".pdf":
+            continue
+        if skip is not None and skip(entry):
             continue
 
-        suffix = p.suffix.lower()
+        # handle name collision in memory: a_dup1.pdf, a_dup2.pdf, ...
+        name = entry.name
+        if name in taken:
+            stem, ext = os.path.splitext(name)
+            n = dup_counts.get(name, 0)
+            while name in taken:  # an input may itself be named a_dup1.pdf
+                n += 1
+                name = f"{stem}_dup{n}{ext}"
+            dup_counts[entry.name] = n
+        taken.add(name)
+
+        if suffix in IMAGE_SUFFIXES:
+            link_jobs.append((entry.path, os.path.join(processed_dir, name)))
+            continue
 
-        if suffix in {".png", ".jpg", ".jpeg"}:
-            shutil.move(str(p), str(PROCESSED_DIR / p.name))
+        reader = PdfReader(entry.path)
+        num_pages = len(reader.pages)
 
-        elif suffix == ".pdf":
-            reader = PdfReader(str(p))
-            num_pages = len(reader.pages)
+        if num_pages <= 1:
+            link_jobs.append((entry.path, os.path.join(processed_dir, name)))
+        else:
+            outputs[Path(entry.path)] = process_multi_page_pdf(
+                Path(entry.path), reader, base_name=os.path.splitext(name)[0], remove_original=False
+            )
 
-            if num_pages <= 1:
-                shutil.move(str(p), str(PROCESSED_DIR / p.name))
+    saved_bufsize = shutil.COPY_BUFSIZE
+    if os.name == "nt":
+        shutil.COPY_BUFSIZE = WINDOWS_COPY_BUFSIZE
+    try:
+        # Linking/copying blocks in syscalls (GIL released), so overlap them
+        with ThreadPoolExecutor(max_workers=LINK_WORKERS) as ex:
+            list(ex.map(lambda job: _link_or_copy(*job), link_jobs))
+    finally:
+        shutil.COPY_BUFSIZE = saved_bufsize
 
-            else:
-                process_multi_page_pdf(p, reader)
+    for src, dest in link_jobs:
+        outputs[Path(src)] = [Path(dest)]
 
+    return outputs
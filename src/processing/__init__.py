@@ -1,5 +1,19 @@
 from .build_dataframe import get_structured_data_from_text
+from .extraction_cache import (
+    file_sha256,
+    make_extraction_key,
+    get_cached_extraction,
+    put_cached_extraction,
+    get_cached_text,
+    put_cached_text,
+)
 
 __all__ = [
     "get_structured_data_from_text",
+    "file_sha256",
+    "make_extraction_key",
+    "get_cached_extraction",
+    "put_cached_extraction",
+    "get_cached_text",
+    "put_cached_text",
 ]
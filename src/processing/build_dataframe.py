@@ -11,7 +11,14 @@ import re
 import traceback
 
 from .vendor_identifier import identify_vendor_and_get_regex, apply_regex_extraction
-from .categorization import get_line_item_category
+from .categorization import get_line_item_category, get_line_item_categories
+
+
+# Arrow-backed strings for line-item text columns that are never null; they
+# are far more compact than object columns of Python str. Nullable columns
+# (unit, amounts) stay as they are so missing values remain None for BSON.
+_ARROW_STRING = pd.StringDtype("pyarrow")
+_ARROW_STRING_COLUMNS = ("vendor_name", "category", "description")
 
 
 class MultipleInvoiceNumberWarning(UserWarning):
@@ -219,6 +226,12 @@ def _determine_category(description: str) -> Optional[str]:
     # This calls the actual logic which will be implemented in src/processing.py
     return get_line_item_category(description)
 
+def _determine_categories(descriptions: List[str]) -> List[Optional[str]]:
+    """
+    Batched form of _determine_category: one category per description.
+    """
+    return get_line_item_categories(descriptions)
+
 def _build_line_items_records(
     extracted_li_data: List[Dict[str, Any]],
     vendor_context: Dict[str, Any],
@@ -238,6 +251,7 @@ def _build_line_items_records(
     
     line_items = []
     
+    # First pass: parse rows, so categories can be fetched in one batch
     for idx, item in enumerate(extracted_li_data):
         if not isinstance(item, dict):
             continue
@@ -257,16 +271,11 @@ def _build_line_items_records(
         
         # Only include items that have at least a description
         if description:
-            # Call the new method to determine category
-            category = _determine_category(description)
-            if category is None:
-                raise ValueError(f"Could not determine category for: {description}")
-
             line_item = {
                 # --- Schema Fields Only ---
                 "invoice_id": None, # Placeholder: To be updated with real ObjectId/Int32 later
                 "vendor_name": vendor_name,
-                "category": category,   # populated by the method
+                "category": None,   # populated below in one batch
                 "quantity": quantity if quantity is not None else 0.0,
                 "unit": unit_val,
                 "description": description,
@@ -277,6 +286,14 @@ def _build_line_items_records(
             
             line_items.append(line_item)
     
+    # Second pass: one categorization request for the whole invoice
+    if line_items:
+        categories = _determine_categories([li["description"] for li in line_items])
+        for line_item, category in zip(line_items, categories):
+            if category is None:
+                raise ValueError(f"Could not determine category for: {line_item['description']}")
+            line_item["category"] = category
+
     # print(f"\nline items  {line_items}")
     
     # If no items were found, return an empty DataFrame with the correct schema columns
@@ -286,4 +303,4 @@ def _build_line_items_records(
             "unit", "description", "unit_price", "line_total", "line_number"
         ])
     
-    return pd.DataFrame(line_items)
+    return pd.DataFrame(line_items).astype({c: _ARROW_STRING for c in _ARROW_STRING_COLUMNS})
@@ -1,7 +1,8 @@
 import os
 import re
+import json
 import google.generativeai as genai
-from typing import List
+from typing import List, Dict, Optional
 
 # Import "dumb" DB methods directly from database module
 from src.storage.database import (
@@ -140,6 +141,47 @@ def predict_category_with_llm(description: str, existing_categories: List[str])
         print(f"[ERROR] LLM Prediction failed: {e}")
         return "Uncategorized"
 
+def build_batch_categorization_prompt(descriptions: List[str], existing_categories: List[str]) -> str:
+    """
+    Constructs a strict prompt for the LLM to categorize several items at once.
+    """
+    categories_str = ", ".join(existing_categories)
+    items_str = "\n".join(f"{i + 1}. '{d}'" for i, d in enumerate(descriptions))
+    return (
+        "You are a precise categorization assistant for restaurant invoices.\n"
+        f"Existing Categories: [{categories_str}]\n"
+        f"Item Descriptions:\n{items_str}\n\n"
+        f"Task: Assign each item to one of the Existing Categories. "
+        f"If an item absolutely does not fit any, create a new, short, generic category name (e.g., 'Dairy', 'Produce', 'Kitchen Supplies').\n"
+        f"Rules: Return ONLY a JSON array of {len(descriptions)} category name strings, in the same order as the items. No explanations. No extra text."
+    )
+
+def predict_categories_with_llm(descriptions: List[str], existing_categories: List[str]) -> Optional[List[str]]:
+    """
+    Predicts categories for several descriptions with a single Gemini call.
+    Does NOT interact with the database.
+
+    Returns None if the call fails or the response is not one category per
+    description, so the caller can fall back to per-item prediction.
+    """
+    prompt = build_batch_categorization_prompt(descriptions, existing_categories)
+
+    try:
+        model = genai.GenerativeModel(LIGHT_MODEL_NAME)
+        response = model.generate_content(prompt)
+
+        raw = response.text.strip().replace("```json", "").replace("```", "").replace("**", "")
+        predicted = json.loads(raw)
+    except Exception as e:
+        print(f"[WARN] Batched LLM prediction failed: {e}")
+        return None
+
+    if not isinstance(predicted, list) or len(predicted) != len(descriptions):
+        print("[WARN] Batched LLM prediction returned the wrong number of categories")
+        return None
+
+    return [str(c).strip() or "Uncategorized" for c in predicted]
+
 def save_category_result(description: str, predicted_category: str, existing_categories: List[str]) -> None:
     """
     Only if category is unseen save to database, but delegates 
@@ -184,3 +226,40 @@ def get_line_item_category(description: str) -> str:
     # print(f"[INFO] Used LLM to get decryption-category pair: Description before: {description}, Cleaned Description: {cleaned_description}, LLM Category: {predicted_category}.")
 
     return predicted_category
+
+def get_line_item_categories(descriptions: List[str]) -> List[str]:
+    """
+    Categorize all line items of an invoice, returning one category per description.
+
+    Stored mappings are reused as in get_line_item_category; the remaining
+    unique descriptions are sent to the LLM in one request instead of one
+    request per line item.
+    """
+    cleaned = [clean_description(d) if d else None for d in descriptions]
+
+    resolved: Dict[str, str] = {}
+    unknown: List[str] = []
+    for c in cleaned:
+        if not c or c in resolved or c in unknown:
+            continue
+        stored_category = get_stored_category(c)
+        if stored_category:
+            resolved[c] = stored_category
+        else:
+            unknown.append(c)
+
+    if unknown:
+        existing_categories = get_all_category_names()
+
+        predicted = predict_categories_with_llm(unknown, existing_categories)
+        if predicted is None:
+            predicted = [predict_category_with_llm(c, existing_categories) for c in unknown]
+
+        for c, category in zip(unknown, predicted):
+            save_category_result(c, category, existing_categories)
+            # Later items in this batch must see categories created by earlier ones
+            if category != "Uncategorized" and category.lower() not in {e.lower() for e in existing_categories}:
+                existing_categories.append(category)
+            resolved[c] = category
+
+    return [resolved.get(c, "Uncategorized") if c else "Uncategorized" for c in cleaned]
@@ -0,0 +1,213 @@
+"""
+Content-addressable cache for structured invoice extraction.
+
+Entries are keyed by SHA-256 of the extracted invoice text together with
+the prompt version and model names, so a cached result is only reused when
+the same text would be sent to the same prompts/models again. Each entry is
+stored as a plain JSON file under data/llm_cache/{key}.json.
+
+A second cache maps the SHA-256 of an uploaded file's bytes to its extracted
+text (data/text_cache/{key}.json), so re-uploading the same file skips
+PDF/OCR text extraction as well.
+"""
+
+import os
+import mmap
+import json
+import hashlib
+import logging
+import datetime
+import tempfile
+from pathlib import Path
+from typing import Optional, Tuple
+
+import pandas as pd
+
+from .vendor_identifier import MODEL_NAME, PROMPT_VERSION
+from .categorization import LIGHT_MODEL_NAME
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path("data") / "llm_cache"
+TEXT_CACHE_DIR = Path("data") / "text_cache"
+
+# Bump when the cached payload layout changes; older entries are evicted on read.
+CACHE_SCHEMA_VERSION = 1
+CACHE_TTL = datetime.timedelta(days=7)
+
+# Columns describing the current run rather than the invoice content.
+_RUN_METADATA_COLUMNS = ("filename", "restaurant_id", "text_length", "page_count", "extraction_timestamp")
+
+
+def make_extraction_key(extracted_text: str) -> str:
+    """Build the cache key for a piece of extracted invoice text."""
+    text_bytes = extracted_text.encode("utf-8")
+    h = hashlib.sha256()
+    # Length-prefix the text so text/version boundaries cannot collide
+    h.update(len(text_bytes).to_bytes(8, "little"))
+    h.update(text_bytes)
+    h.update(PROMPT_VERSION.encode("utf-8"))
+    h.update(MODEL_NAME.encode("utf-8"))
+    h.update(LIGHT_MODEL_NAME.encode("utf-8"))
+    return h.hexdigest()
+
+
+def file_sha256(file_path) -> str:
+    """
+    SHA-256 hex digest of a file's contents without reading it into one bytes object.
+
+    Uses hashlib.file_digest where available (3.11+), otherwise hashes an
+    mmap of the file so the OS pages it straight into the hash.
+    """
+    with open(file_path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+
+        h = hashlib.sha256()
+        # mmap rejects empty files
+        if os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                h.update(mm)
+        return h.hexdigest()
+
+
+def _entry_path(key: str) -> Path:
+    return CACHE_DIR / f"{key}.json"
+
+
+def _evict(path: Path) -> None:
+    try:
+        path.unlink()
+    except OSError as e:
+        logger.debug(f"Could not evict cache entry {path}: {e}")
+
+
+def _atomic_write_json(path: Path, entry: dict, **dump_kwargs) -> None:
+    """
+    Write `entry` as JSON to `path` via a uniquely named temp file and os.replace,
+    so concurrent writers of the same key never share or truncate a temp file
+    and readers only ever see a complete entry. Raises on failure.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(prefix=f".tmp-{path.stem}-", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f, **dump_kwargs)
+        os.replace(temp_name, path)
+    except BaseException:
+        _evict(Path(temp_name))
+        raise
+
+
+def get_cached_extraction(key: str, **run_metadata) -> Optional[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Return the cached (inv_df, li_df) for `key`, or None on a miss.
+
+    Expired entries and entries written with another schema version are
+    deleted. Any keyword arguments (filename, restaurant_id, ...) overwrite
+    the matching invoice columns so the result reflects the current run.
+    """
+    path = _entry_path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Unreadable cache entry {path}: {e}")
+        _evict(path)
+        return None
+
+    if entry.get("schema_version") != CACHE_SCHEMA_VERSION:
+        _evict(path)
+        return None
+
+    try:
+        expires_at = datetime.datetime.fromisoformat(entry["expires_at"])
+    except (KeyError, TypeError, ValueError):
+        _evict(path)
+        return None
+
+    if expires_at <= datetime.datetime.now(datetime.timezone.utc):
+        _evict(path)
+        return None
+
+    inv_df = pd.DataFrame.from_records(entry.get("invoice", []))
+    li_df = pd.DataFrame.from_records(entry.get("line_items", []), columns=entry.get("line_item_columns"))
+
+    if inv_df.empty:
+        _evict(path)
+        return None
+
+    for col, val in run_metadata.items():
+        if col in _RUN_METADATA_COLUMNS:
+            inv_df[col] = val
+
+    return inv_df, li_df
+
+
+def put_cached_extraction(key: str, inv_df: pd.DataFrame, li_df: pd.DataFrame) -> None:
+    """Store (inv_df, li_df) under `key`. Failures are logged, never raised."""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    entry = {
+        "schema_version": CACHE_SCHEMA_VERSION,
+        "created_at": now.isoformat(),
+        "expires_at": (now + CACHE_TTL).isoformat(),
+        "invoice": inv_df.to_dict("records"),
+        "line_items": li_df.to_dict("records"),
+        "line_item_columns": list(li_df.columns),
+    }
+
+    path = _entry_path(key)
+    try:
+        # ObjectIds / timestamps are stored as strings; storage re-parses them
+        _atomic_write_json(path, entry, default=str)
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning(f"Could not write cache entry {path}: {e}")
+
+
+def get_cached_text(file_key: str) -> Optional[Tuple[str, int, int]]:
+    """
+    Return the cached (extracted_text, text_length, page_count) for a file
+    digest (see file_sha256), or None on a miss. Expired entries are deleted.
+    """
+    path = TEXT_CACHE_DIR / f"{file_key}.json"
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Unreadable text cache entry {path}: {e}")
+        _evict(path)
+        return None
+
+    try:
+        if entry["schema_version"] != CACHE_SCHEMA_VERSION:
+            raise ValueError("schema version changed")
+        if datetime.datetime.fromisoformat(entry["expires_at"]) <= datetime.datetime.now(datetime.timezone.utc):
+            raise ValueError("expired")
+        return entry["text"], entry["text_length"], entry["page_count"]
+    except (KeyError, TypeError, ValueError):
+        _evict(path)
+        return None
+
+
+def put_cached_text(file_key: str, extracted_text: str, text_length: int, page_count: int) -> None:
+    """Store extracted text under a file digest. Failures are logged, never raised."""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    entry = {
+        "schema_version": CACHE_SCHEMA_VERSION,
+        "created_at": now.isoformat(),
+        "expires_at": (now + CACHE_TTL).isoformat(),
+        "text": extracted_text,
+        "text_length": text_length,
+        "page_count": page_count,
+    }
+
+    path = TEXT_CACHE_DIR / f"{file_key}.json"
+    try:
+        _atomic_write_json(path, entry)
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning(f"Could not write text cache entry {path}: {e}")
@@ -3,6 +3,7 @@ import re
 import time
 import json
 import logging
+import threading
 from typing import Optional, Dict, Any, Tuple, List, Union
 from dotenv import load_dotenv
 
@@ -34,6 +35,14 @@ load_dotenv()
 
 MODEL_NAME = "gemini-2.5-flash"
 
+# Bump whenever the phase-1 / phase-2 prompts change so cached extractions
+# produced by the old prompts are not reused.
+PROMPT_VERSION = "1"
+
+# Serializes the lookup-or-create of unknown vendors so concurrent workers
+# handling invoices from the same new vendor do not each save a copy.
+_VENDOR_CREATE_LOCK = threading.Lock()
+
 # ----------------------------
 # Setup
 # ----------------------------
@@ -1084,6 +1093,39 @@ def apply_regex_extraction(
 
     return inv_data, line_items
 
+def _create_vendor_from_text(text: str) -> Dict[str, Any]:
+    """
+    Create a new vendor and its regex templates from the invoice text via the LLM phases.
+    Callers must hold _VENDOR_CREATE_LOCK.
+    """
+    # Phase 1: Extract clean master data
+    phase1 = llm_phase1_extract(text)
+    if phase1:
+        # Merge new LLM data with existing signals
+        vendor = phase1["vendor_master_data"]
+        
+        # Phase 2: Generate Regex
+        new_regexes = llm_phase2_generate_regex(text, phase1)
+        
+        # Create Vendor
+        new_vendor_id = save_vendor_details(vendor)
+        vendor_name = find_vendor_name_by_id(new_vendor_id)
+        
+        if new_regexes:
+            save_regex_for_vendor(new_vendor_id, new_regexes)
+            return {
+                "vendor_id": new_vendor_id,
+                "vendor_name": vendor_name,
+                "regex": new_regexes,
+                "created": True,
+                "matched_by": None
+            }
+        else:
+            # LLM Phase 2 failed
+            raise ValueError("Vendor not found — LLM Phase 2 failed")
+    else:
+        raise ValueError("Vendor not found — But llm phase-1 output failed")
+
 def identify_vendor_and_get_regex(text: str, file_path: str) -> Dict[str, Any]:
     """
     Main orchestration function used by pipeline.
@@ -1109,11 +1151,15 @@ def identify_vendor_and_get_regex(text: str, file_path: str) -> Dict[str, Any]:
 
     # 2. Search for existing vendor
     search_result = search_vendor_by_signals(signals)
-    if search_result:
-        vendor_id, matched_by = search_result
-    else:
-        vendor_id = None
-        matched_by = None
+    if not search_result:
+        # Another worker may be creating this vendor right now; re-check
+        # under the lock so only one of them saves it.
+        with _VENDOR_CREATE_LOCK:
+            search_result = search_vendor_by_signals(signals)
+            if not search_result:
+                return _create_vendor_from_text(text)
+
+    vendor_id, matched_by = search_result
 
     print(f"Matched by: ", matched_by)
     # --- CASE A: Vendor Found in DB ---
@@ -1134,33 +1180,3 @@ def identify_vendor_and_get_regex(text: str, file_path: str) -> Dict[str, Any]:
         # A2. Vendor exists, but NO Regex found -> Raise error
         else:
             raise ValueError("Vendor found — But no regex for that vendor found in DB")
-
-    # --- CASE B: Vendor NOT Found (Create New) ---
-    else:
-        # Phase 1: Extract clean master data
-        phase1 = llm_phase1_extract(text)
-        if phase1:
-                # Merge new LLM data with existing signals
-                vendor = phase1["vendor_master_data"]
-                
-                # Phase 2: Generate Regex
-                new_regexes = llm_phase2_generate_regex(text, phase1)
-                
-                # Create Vendor
-                new_vendor_id = save_vendor_details(vendor)
-                vendor_name = find_vendor_name_by_id(vendor_id)
-                
-                if new_regexes:
-                    save_regex_for_vendor(new_vendor_id, new_regexes)
-                    return {
-                        "vendor_id": new_vendor_id,
-                        "vendor_name": vendor_name,
-                        "regex": new_regexes,
-                        "created": True,
-                        "matched_by": None
-                    }
-                else:
-                    # LLM Phase 2 failed
-                    raise ValueError("Vendor not found — LLM Phase 2 failed")
-        else:
-            raise ValueError("Vendor not found — But llm phase-1 output failed")
@@ -12,8 +12,10 @@ from .database import (
     get_all_category_names,
     get_stored_category,
     insert_master_category,
+    insert_master_categories,
     upsert_item_mapping,
     save_inv_li_to_db,
+    save_inv_li_batch,
 )
 
 __all__ = [
@@ -30,6 +32,8 @@ __all__ = [
     "get_all_category_names",
     "get_stored_category",
     "insert_master_category",
+    "insert_master_categories",
     "upsert_item_mapping",
     "save_inv_li_to_db",
+    "save_inv_li_batch",
 ]
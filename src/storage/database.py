@@ -1,3 +1,4 @@
+import io
 import os
 import re
 import datetime
@@ -5,9 +6,13 @@ import logging
 import pandas as pd
 from typing import Optional, List, Dict, Any, Tuple
 from bson import ObjectId
-from pymongo import MongoClient
+from bson.decimal128 import Decimal128
+from pymongo import DeleteMany, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
 from dotenv import load_dotenv
 
+from src.storage.db_init import get_client
+
 # Configure logger
 logger = logging.getLogger(__name__)
 
@@ -15,10 +20,10 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 # Setup MongoDB Connection
-MONGO_URI = os.getenv("MONGODB_URI")
 DB_NAME = os.getenv("DB_NAME")
 
-client = MongoClient(MONGO_URI)
+# Module import runs once per process, so Streamlit reruns reuse this pool
+client = get_client()
 db = client[DB_NAME]
 
 # ---------------------------------------------------------
@@ -217,11 +222,35 @@ def get_vendor_name_by_id(vendor_id: str) -> Optional[str]:
 
     doc = db[COL_VENDORS].find_one(
         {"_id": oid},
-        {"name": 1}
+        {"name": 1, "_id": 0}
     )
 
     return doc.get("name") if doc else None
 
+
+def get_vendor_names_by_ids(vendor_ids: List[str]) -> Dict[str, str]:
+    """
+    Resolve many vendor ids to names with a single query.
+    
+    Args:
+        vendor_ids: Vendor ObjectIds as strings (duplicates and invalid ids are ignored)
+        
+    Returns:
+        Dict mapping vendor id string to vendor name, for the ids that exist
+    """
+    oids = []
+    for vendor_id in set(vendor_ids):
+        try:
+            oids.append(ObjectId(vendor_id))
+        except Exception:
+            logger.warning(f"Invalid vendor_id format: {vendor_id}")
+    
+    if not oids:
+        return {}
+    
+    cursor = db[COL_VENDORS].find({"_id": {"$in": oids}}, {"name": 1})
+    return {str(doc["_id"]): doc.get("name") for doc in cursor}
+
 # ---------------------------------------------------------
 # Invoice + Line Item Save Method 
 # ---------------------------------------------------------
@@ -238,6 +267,45 @@ def to_float(val):
         logger.debug(f"Could not convert value '{val}' to float: {e}")
         return 0.0
 
+# ---------------------------------------------------------
+# HELPER: Document Builders
+# ---------------------------------------------------------
+def _build_invoice_doc(inv_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert one invoice row (dict) to a MongoDB invoice document."""
+    return {
+        "filename": inv_data.get("filename"),
+        "restaurant_id": ObjectId(inv_data.get("restaurant_id")),
+        "vendor_id": ObjectId(inv_data.get("vendor_id")),
+        "invoice_number": str(inv_data.get("invoice_number")),
+        "invoice_date": pd.to_datetime(inv_data.get("invoice_date")),
+        "invoice_total_amount": to_float(inv_data.get("invoice_total_amount")),
+        "text_length": int(inv_data.get("text_length", 0)),
+        "page_count": int(inv_data.get("page_count", 0)),
+        "extraction_timestamp": pd.to_datetime(inv_data.get("extraction_timestamp")),
+        "order_date": pd.to_datetime(inv_data.get("order_date"))
+    }
+
+def _build_line_item_docs(li_df: pd.DataFrame, invoice_id: ObjectId) -> List[Dict[str, Any]]:
+    """Convert a line items DataFrame to MongoDB documents linked to invoice_id."""
+    if li_df.empty:
+        return []
+
+    clean_line_items = []
+    for item in li_df.to_dict("records"):
+        # Map fields and enforce types
+        clean_line_items.append({
+            "invoice_id": invoice_id,  # LINKING HAPPENS HERE (ObjectId)
+            "vendor_name": str(item.get("vendor_name", "")),
+            "category": str(item.get("category") or "Uncategorized"),
+            "quantity": float(item.get("quantity", 0.0)),
+            "unit": str(item.get("unit") or ""),
+            "description": str(item.get("description", "")),
+            "unit_price": to_float(item.get("unit_price")),
+            "line_total": to_float(item.get("line_total")),
+            "line_number": to_float(item.get("line_number"))
+        })
+    return clean_line_items
+
 # ---------------------------------------------------------
 # MAIN SAVE FUNCTION
 # ---------------------------------------------------------
@@ -264,18 +332,7 @@ def save_inv_li_to_db(inv_df: pd.DataFrame, li_df: pd.DataFrame):
 
     try:
         # Convert pandas/native types to MongoDB BSON types
-        invoice_doc = {
-            "filename": inv_data.get("filename"),
-            "restaurant_id": ObjectId(inv_data.get("restaurant_id")),
-            "vendor_id": ObjectId(inv_data.get("vendor_id")),
-            "invoice_number": str(inv_data.get("invoice_number")),
-            "invoice_date": pd.to_datetime(inv_data.get("invoice_date")),
-            "invoice_total_amount": to_float(inv_data.get("invoice_total_amount")),
-            "text_length": int(inv_data.get("text_length", 0)),
-            "page_count": int(inv_data.get("page_count", 0)),
-            "extraction_timestamp": pd.to_datetime(inv_data.get("extraction_timestamp")),
-            "order_date": pd.to_datetime(inv_data.get("order_date"))
-        }
+        invoice_doc = _build_invoice_doc(inv_data)
 
         # 3. Insert Invoice
         print(f"[INFO] Inserting invoice: {invoice_doc['invoice_number']}...")
@@ -284,30 +341,12 @@ def save_inv_li_to_db(inv_df: pd.DataFrame, li_df: pd.DataFrame):
         print(f"[SUCCESS] Invoice saved. ID: {new_invoice_id}")
 
         # 4. Prepare Line Items
-        if not li_df.empty:
-            # Convert DF to list of dicts for iteration
-            li_records = li_df.to_dict("records")
-            
-            clean_line_items = []
-            for item in li_records:
-                # Map fields and enforce types
-                clean_item = {
-                    "invoice_id": new_invoice_id,  # LINKING HAPPENS HERE (ObjectId)
-                    "vendor_name": str(item.get("vendor_name", "")),
-                    "category": str(item.get("category") or "Uncategorized"),
-                    "quantity": float(item.get("quantity", 0.0)),
-                    "unit": str(item.get("unit") or ""),
-                    "description": str(item.get("description", "")),
-                    "unit_price": to_float(item.get("unit_price")),
-                    "line_total": to_float(item.get("line_total")),
-                    "line_number": to_float(item.get("line_number"))
-                }
-                clean_line_items.append(clean_item)
+        clean_line_items = _build_line_item_docs(li_df, new_invoice_id)
 
-            # 5. Bulk Insert Line Items
-            if clean_line_items:
-                db.line_items.insert_many(clean_line_items)
-                print(f"[SUCCESS] Saved {len(clean_line_items)} line items.")
+        # 5. Bulk Insert Line Items
+        if clean_line_items:
+            db.line_items.insert_many(clean_line_items)
+            print(f"[SUCCESS] Saved {len(clean_line_items)} line items.")
         else:
             print("[INFO] No line items found to save.")
         
@@ -325,27 +364,160 @@ def save_inv_li_to_db(inv_df: pd.DataFrame, li_df: pd.DataFrame):
             "invoice_id": None
         }
 
+def save_inv_li_batch(inv_dfs: List[pd.DataFrame], li_dfs: List[pd.DataFrame]) -> Dict[str, Any]:
+    """
+    Saves many invoices and their line items with one insert_many per collection.
+
+    Invoice _ids are generated client-side so line items can be linked before
+    anything is sent. Invoices are inserted unordered; any that fail (e.g. the
+    vendor_id + invoice_number unique index) are reported and their line
+    items are dropped so no orphans are written.
+
+    Args:
+        inv_dfs: One single-row invoice DataFrame per invoice.
+        li_dfs: The matching line items DataFrame for each invoice.
+
+    Returns:
+        Dict with keys:
+            'success', 'message'
+            'invoice_ids': saved invoice ids (as str)
+            'errors': input position -> reason, for invoices that were not saved
+            'duplicates': input positions rejected by a duplicate key (code 11000)
+            'line_items_failed': input positions whose invoice was saved but whose
+                line items were not (all or part)
+    """
+    invoice_docs = []
+    line_item_groups = []
+    input_positions = []
+    errors = {}
+    duplicates = []
+
+    for pos, (inv_df, li_df) in enumerate(zip(inv_dfs, li_dfs)):
+        if inv_df.empty:
+            errors[pos] = "No invoice data to save"
+            continue
+        try:
+            invoice_doc = _build_invoice_doc(inv_df.iloc[0].to_dict())
+            invoice_doc["_id"] = ObjectId()
+            line_items = _build_line_item_docs(li_df, invoice_doc["_id"])
+        except Exception as e:
+            print(f"[ERROR] Could not prepare invoice for saving: {e}")
+            errors[pos] = f"Error preparing invoice: {str(e)}"
+            continue
+        invoice_docs.append(invoice_doc)
+        line_item_groups.append(line_items)
+        input_positions.append(pos)
+
+    if not invoice_docs:
+        return {
+            "success": False,
+            "message": "No invoice data to save",
+            "invoice_ids": [],
+            "errors": errors,
+            "duplicates": duplicates,
+            "line_items_failed": []
+        }
+
+    failed_indexes = set()
+    try:
+        db.invoices.insert_many(invoice_docs, ordered=False)
+    except BulkWriteError as bwe:
+        for err in bwe.details.get("writeErrors", []):
+            pos = input_positions[err.get("index")]
+            failed_indexes.add(err.get("index"))
+            errors[pos] = err.get("errmsg", "Write error")
+            if err.get("code") == 11000:
+                duplicates.append(pos)
+            print(f"[WARN] Invoice not saved: {err.get('errmsg')}")
+    except Exception as e:
+        print(f"[ERROR] Failed to save invoice batch: {e}")
+        for pos in input_positions:
+            errors[pos] = f"Error saving invoices: {str(e)}"
+        return {
+            "success": False,
+            "message": f"Error saving invoices: {str(e)}",
+            "invoice_ids": [],
+            "errors": errors,
+            "duplicates": duplicates,
+            "line_items_failed": []
+        }
+
+    saved_ids = []
+    saved_positions = []
+    clean_line_items = []
+    line_item_owner = []  # input position of each entry in clean_line_items
+    for idx, (invoice_doc, line_items) in enumerate(zip(invoice_docs, line_item_groups)):
+        if idx in failed_indexes:
+            continue
+        saved_ids.append(str(invoice_doc["_id"]))
+        saved_positions.append(input_positions[idx])
+        clean_line_items.extend(line_items)
+        line_item_owner.extend([input_positions[idx]] * len(line_items))
+
+    line_items_failed = set()
+    line_item_error = None
+    try:
+        if clean_line_items:
+            db.line_items.insert_many(clean_line_items, ordered=False)
+    except BulkWriteError as bwe:
+        for err in bwe.details.get("writeErrors", []):
+            line_items_failed.add(line_item_owner[err.get("index")])
+            line_item_error = err.get("errmsg", "Write error")
+    except Exception as e:
+        line_items_failed.update(saved_positions)
+        line_item_error = str(e)
+
+    if line_items_failed:
+        print(f"[ERROR] Failed to save line items for {len(line_items_failed)} invoice(s): {line_item_error}")
+        return {
+            "success": False,
+            "message": f"Saved {len(saved_ids)} invoices but line items failed for {len(line_items_failed)}: {line_item_error}",
+            "invoice_ids": saved_ids,
+            "errors": errors,
+            "duplicates": duplicates,
+            "line_items_failed": sorted(line_items_failed)
+        }
+
+    print(f"[SUCCESS] Saved {len(saved_ids)} invoices and {len(clean_line_items)} line items.")
+    failed = len(errors)
+    return {
+        "success": failed == 0,
+        "message": f"Saved {len(saved_ids)} invoices" + (f", {failed} failed" if failed else ""),
+        "invoice_ids": saved_ids,
+        "errors": errors,
+        "duplicates": duplicates,
+        "line_items_failed": []
+    }
+
 # ---------------------------------------------------------
 # Invoice Retrieval & Update Methods (CRUD Operations)
 # ---------------------------------------------------------
 
-def get_invoice_by_id(invoice_id: str) -> Optional[Dict[str, Any]]:
+def get_invoice_by_id(
+    invoice_id: str,
+    fields: Optional[List[str]] = None,
+    line_item_fields: Optional[List[str]] = None
+) -> Optional[Dict[str, Any]]:
     """
     Retrieve an invoice by its ID with its line items.
     
     Args:
         invoice_id: The invoice ObjectId as string
+        fields: Invoice fields to return (default: all). _id is always included.
+        line_item_fields: Line item fields to return (default: all). _id is always included.
         
     Returns:
         Invoice document with line_items array or None
     """
     try:
         oid = ObjectId(invoice_id)
-        invoice = db.invoices.find_one({"_id": oid})
+        projection = dict.fromkeys(fields, 1) if fields else None
+        invoice = db.invoices.find_one({"_id": oid}, projection)
         
         if invoice:
             # Fetch associated line items from separate collection
-            line_items = list(db.line_items.find({"invoice_id": oid}))
+            li_projection = dict.fromkeys(line_item_fields, 1) if line_item_fields else None
+            line_items = list(db.line_items.find({"invoice_id": oid}, li_projection))
             invoice["line_items"] = line_items
             
         return invoice
@@ -376,6 +548,38 @@ def check_duplicate_invoice(vendor_id: str, invoice_number: str) -> Optional[Dic
         return None
 
 
+def find_duplicate_invoices(pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], str]:
+    """
+    Check many (vendor_id, invoice_number) pairs for existing invoices in one query.
+    
+    Args:
+        pairs: (vendor ObjectId as string, invoice number) tuples
+        
+    Returns:
+        Dict mapping each pair that already exists to the existing invoice _id as string
+    """
+    clauses = []
+    for vendor_id, invoice_number in set(pairs):
+        try:
+            clauses.append({"vendor_id": ObjectId(vendor_id), "invoice_number": invoice_number})
+        except Exception:
+            continue  # Not a valid vendor id, so it cannot match anything
+    
+    if not clauses:
+        return {}
+    
+    try:
+        # Each clause is an exact match on the unique (vendor_id, invoice_number) index
+        cursor = db.invoices.find({"$or": clauses}, {"_id": 1, "vendor_id": 1, "invoice_number": 1})
+        return {
+            (str(doc["vendor_id"]), doc["invoice_number"]): str(doc["_id"])
+            for doc in cursor
+        }
+    except Exception as e:
+        print(f"Error checking duplicates: {e}")
+        return {}
+
+
 def update_invoice(invoice_id: str, update_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Update invoice fields (header level only, not line items).
@@ -503,6 +707,37 @@ def delete_line_item(line_item_id: str) -> Dict[str, Any]:
         return {"success": False, "message": f"Error deleting line item: {str(e)}"}
 
 
+def delete_invoice(invoice_id: str) -> Dict[str, Any]:
+    """
+    Delete an invoice together with its line items.
+    
+    Line items go first so a failure never leaves orphaned items behind.
+    
+    Args:
+        invoice_id: The invoice ObjectId as string
+        
+    Returns:
+        dict: {"success": bool, "message": str, "deleted_line_items": int}
+    """
+    try:
+        oid = ObjectId(invoice_id)
+        
+        li_result = db.line_items.delete_many({"invoice_id": oid})
+        inv_result = db.invoices.delete_one({"_id": oid})
+        
+        if inv_result.deleted_count > 0:
+            return {
+                "success": True,
+                "message": "Invoice deleted successfully",
+                "deleted_line_items": li_result.deleted_count
+            }
+        else:
+            return {"success": False, "message": "Invoice not found", "deleted_line_items": li_result.deleted_count}
+            
+    except Exception as e:
+        return {"success": False, "message": f"Error deleting invoice: {str(e)}", "deleted_line_items": 0}
+
+
 def add_line_item(invoice_id: str, line_item_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Add a new line item to an invoice in the line_items collection.
@@ -572,6 +807,110 @@ def add_line_item(invoice_id: str, line_item_data: Dict[str, Any]) -> Dict[str,
     except Exception as e:
         return {"success": False, "message": f"Error adding line item: {str(e)}"}
 
+def _to_money(value) -> Decimal128:
+    """Price/total from the editor (str, number, Decimal or Decimal128) as Decimal128."""
+    if isinstance(value, Decimal128):
+        return value
+    if isinstance(value, str):
+        value = value.replace(",", "")
+    return Decimal128(str(float(value or 0)))
+
+
+def _to_quantity(value) -> float:
+    """Quantity from the editor (str, number, Decimal or Decimal128) as float."""
+    if isinstance(value, Decimal128):
+        return float(value.to_decimal())
+    if isinstance(value, str):
+        value = value.replace(",", "")
+    return float(value or 0)
+
+
+def save_line_item_changes(
+    invoice_id: str,
+    deleted_ids: List[str],
+    updates: List[Tuple[str, Dict[str, Any]]],
+    new_items: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Apply an edited line items table to an invoice with a single bulk_write.
+    
+    Args:
+        invoice_id: The invoice ObjectId as string
+        deleted_ids: Line item ObjectIds (as strings) to delete
+        updates: (line item id, fields to set) pairs for existing line items
+        new_items: Line item fields for rows to add to the invoice
+        
+    Returns:
+        dict: {"success": bool, "message": str, "deleted": int, "updated": int, "inserted": int}
+    """
+    try:
+        oid = ObjectId(invoice_id)
+        now = datetime.datetime.now()
+        ops = []
+        
+        if deleted_ids:
+            ops.append(DeleteMany({"_id": {"$in": [ObjectId(li_id) for li_id in deleted_ids]}, "invoice_id": oid}))
+        
+        for li_id, fields in updates:
+            update_data = dict(fields)
+            for key in ("unit_price", "line_total"):
+                if key in update_data:
+                    update_data[key] = _to_money(update_data[key])
+            if "quantity" in update_data:
+                update_data["quantity"] = _to_quantity(update_data["quantity"])
+            update_data["updated_at"] = now
+            ops.append(UpdateOne({"_id": ObjectId(li_id)}, {"$set": update_data}))
+        
+        if new_items:
+            invoice = db.invoices.find_one({"_id": oid}, {"vendor_name": 1})
+            if not invoice:
+                return {"success": False, "message": "Invoice not found", "deleted": 0, "updated": 0, "inserted": 0}
+            
+            # New rows are numbered after the current last line
+            last = db.line_items.find_one({"invoice_id": oid}, {"line_number": 1}, sort=[("line_number", -1)])
+            last_number = last.get("line_number", 0) if last else 0
+            if isinstance(last_number, Decimal128):
+                last_number = last_number.to_decimal()
+            
+            for offset, item in enumerate(new_items, start=1):
+                ops.append(InsertOne({
+                    "invoice_id": oid,
+                    "vendor_name": item.get("vendor_name", invoice.get("vendor_name", "")),
+                    "category": item.get("category", "Uncategorized"),
+                    "description": str(item.get("description", "")),
+                    "quantity": _to_quantity(item.get("quantity", 0)),
+                    "unit": str(item.get("unit", "")),
+                    "unit_price": _to_money(item.get("unit_price", 0)),
+                    "line_total": _to_money(item.get("line_total", 0)),
+                    "line_number": Decimal128(str(int(last_number) + offset)),
+                }))
+        
+        if not ops:
+            return {"success": True, "message": "No line item changes", "deleted": 0, "updated": 0, "inserted": 0}
+        
+        result = db.line_items.bulk_write(ops, ordered=False)
+        return {
+            "success": True,
+            "message": "Line items updated successfully",
+            "deleted": result.deleted_count,
+            "updated": result.modified_count,
+            "inserted": result.inserted_count
+        }
+    
+    except BulkWriteError as bwe:
+        details = bwe.details
+        errors = details.get("writeErrors", [])
+        return {
+            "success": False,
+            "message": f"{len(errors)} line item change(s) failed: {errors[0].get('errmsg') if errors else 'unknown error'}",
+            "deleted": details.get("nRemoved", 0),
+            "updated": details.get("nModified", 0),
+            "inserted": details.get("nInserted", 0)
+        }
+    except Exception as e:
+        return {"success": False, "message": f"Error saving line items: {str(e)}", "deleted": 0, "updated": 0, "inserted": 0}
+
+
 def get_line_items_by_invoice(invoice_id: str) -> List[Dict[str, Any]]:
     """
     Retrieve all line items for a specific invoice.
@@ -610,6 +949,16 @@ def insert_master_category(category_name: str) -> None:
         # Log duplicate key errors at debug level (expected during race conditions)
         logger.debug(f"Category '{category_name}' already exists or insert failed: {e}")
 
+def insert_master_categories(category_names: List[str]) -> None:
+    """Inserts several categories into the master list in one round-trip."""
+    if not category_names:
+        return
+    try:
+        # ordered=False keeps writing past names that already exist
+        db.categories.insert_many([{"_id": name} for name in category_names], ordered=False)
+    except BulkWriteError as e:
+        logger.debug(f"Some master categories already exist: {e.details.get('nInserted', 0)} inserted")
+
 def upsert_item_mapping(description: str, category_name: str) -> None:
     """Links a description to a category forever."""
     db.item_lookup_map.update_one(
@@ -622,6 +971,51 @@ def upsert_item_mapping(description: str, category_name: str) -> None:
 # Temporary Upload Session Methods (for session persistence)
 # ---------------------------------------------------------
 
+# DataFrame fields of each uploaded invoice; stored as Feather (Arrow IPC) bytes
+TEMP_UPLOAD_DF_KEYS = ("invoice_df", "line_items_df")
+
+
+def _df_to_feather_bytes(df: pd.DataFrame) -> bytes:
+    """Serialize a DataFrame to Feather bytes (ObjectIds are stored as strings)."""
+    df = df.reset_index(drop=True)
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].map(lambda v: str(v) if isinstance(v, ObjectId) else v)
+
+    buf = io.BytesIO()
+    try:
+        df.to_feather(buf)
+    except Exception as e:
+        # Mixed-type object columns can't be typed by Arrow; keep them as text,
+        # leaving missing values null rather than the strings "None"/"nan"
+        logger.warning(f"Storing mixed-type columns as text in temp upload: {e}")
+        buf = io.BytesIO()
+        obj_cols = df.columns[df.dtypes == object]
+        df[obj_cols] = df[obj_cols].astype(str).where(df[obj_cols].notna(), None)
+        df.to_feather(buf)
+    return buf.getvalue()
+
+
+def _encode_temp_invoices(invoices: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Replace each invoice's DataFrames with Feather bytes for storage."""
+    encoded = []
+    for invoice in invoices:
+        invoice = dict(invoice)
+        for key in TEMP_UPLOAD_DF_KEYS:
+            if isinstance(invoice.get(key), pd.DataFrame):
+                invoice[key] = _df_to_feather_bytes(invoice[key])
+        encoded.append(invoice)
+    return encoded
+
+
+def _decode_temp_invoices(invoices: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Rebuild the DataFrames stored by _encode_temp_invoices."""
+    for invoice in invoices:
+        for key in TEMP_UPLOAD_DF_KEYS:
+            if isinstance(invoice.get(key), bytes):
+                invoice[key] = pd.read_feather(io.BytesIO(invoice[key]))
+    return invoices
+
+
 def save_temp_upload(session_id: str, upload_data: Dict[str, Any]) -> bool:
     """
     Save temporary upload data for session persistence.
@@ -637,6 +1031,8 @@ def save_temp_upload(session_id: str, upload_data: Dict[str, Any]) -> bool:
         import datetime
         
         upload_data["session_id"] = session_id
+        if "invoices" in upload_data:
+            upload_data["invoices"] = _encode_temp_invoices(upload_data["invoices"])
         upload_data["created_at"] = datetime.datetime.now()
         upload_data["updated_at"] = datetime.datetime.now()
         
@@ -662,7 +1058,10 @@ def get_temp_upload(session_id: str) -> Optional[Dict[str, Any]]:
         Dictionary with upload data or None
     """
     try:
-        return db.temp_uploads.find_one({"session_id": session_id})
+        doc = db.temp_uploads.find_one({"session_id": session_id})
+        if doc and "invoices" in doc:
+            doc["invoices"] = _decode_temp_invoices(doc["invoices"])
+        return doc
     except Exception as e:
         print(f"Error retrieving temp upload: {e}")
         return None
@@ -741,11 +1140,60 @@ def get_all_vendors() -> List[Dict[str, Any]]:
     return list(db.vendors.find({}, {"_id": 1, "name": 1}).sort("name", 1))
 
 
+def get_all_vendor_details() -> List[Dict[str, Any]]:
+    """
+    Get all vendors with their contact details in one query.
+    
+    Returns:
+        List of vendor documents with _id, name, email, phone, website, is_active
+    """
+    return list(db.vendors.find(
+        {},
+        {"_id": 1, "name": 1, "email": 1, "phone": 1, "website": 1, "is_active": 1}
+    ).sort("name", 1))
+
+
+def get_line_item_categories() -> List[str]:
+    """
+    Get every category stored on line items, including "Uncategorized"
+    and any not in the master categories list.
+
+    Returns:
+        Sorted list of category names
+    """
+    # Served from the category index
+    return sorted(c for c in db.line_items.distinct("category") if c)
+
+
+def _line_items_lookup(categories: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Build the $lookup stage body joining invoices to their line_items.
+
+    Args:
+        categories: Optional category names; when given, items are filtered on
+            the server (using the (invoice_id, category) index) instead of
+            shipping every item back
+
+    Returns:
+        Dict: $lookup specification producing a "line_items" array
+    """
+    lookup = {
+        "from": "line_items",
+        "localField": "_id",
+        "foreignField": "invoice_id",
+        "as": "line_items"
+    }
+    if categories:
+        lookup["pipeline"] = [{"$match": {"category": {"$in": list(categories)}}}]
+    return lookup
+
+
 def get_invoice_line_items_joined(
     start_date: Optional[datetime.datetime] = None,
     end_date: Optional[datetime.datetime] = None,
     restaurant_ids: Optional[List[ObjectId]] = None,
-    vendor_ids: Optional[List[ObjectId]] = None
+    vendor_ids: Optional[List[ObjectId]] = None,
+    categories: Optional[List[str]] = None
 ) -> pd.DataFrame:
     """
     Get joined invoice and line item data with vendor and restaurant names.
@@ -758,6 +1206,7 @@ def get_invoice_line_items_joined(
         end_date: Filter invoices to this date (inclusive)
         restaurant_ids: Filter by restaurant IDs (None = all)
         vendor_ids: Filter by vendor IDs (None = all)
+        categories: Filter line items by category (None = all)
     
     Returns:
         DataFrame with columns: invoice_id, invoice_number, invoice_date, 
@@ -786,31 +1235,26 @@ def get_invoice_line_items_joined(
         {"$match": match_filter},
         
         # Join with line_items
-        {
-            "$lookup": {
-                "from": "line_items",
-                "localField": "_id",
-                "foreignField": "invoice_id",
-                "as": "line_items"
-            }
-        },
+        {"$lookup": _line_items_lookup(categories)},
         
-        # Join with vendors
+        # Join with vendors (only the name is used)
         {
             "$lookup": {
                 "from": "vendors",
                 "localField": "vendor_id",
                 "foreignField": "_id",
+                "pipeline": [{"$project": {"_id": 0, "name": 1}}],
                 "as": "vendor_info"
             }
         },
         
-        # Join with restaurants
+        # Join with restaurants (only the location name is used)
         {
             "$lookup": {
                 "from": "restaurants",
                 "localField": "restaurant_id",
                 "foreignField": "_id",
+                "pipeline": [{"$project": {"_id": 0, "location_name": 1}}],
                 "as": "restaurant_info"
             }
         },
@@ -820,9 +1264,11 @@ def get_invoice_line_items_joined(
         {"$unwind": "$vendor_info"},
         {"$unwind": "$restaurant_info"},
         
-        # Project final structure
+        # Project final structure (only the columns the pages use; _id is
+        # already carried as the invoice_id string)
         {
             "$project": {
+                "_id": 0,
                 "invoice_id": {"$toString": "$_id"},
                 "invoice_number": 1,
                 "invoice_date": 1,
@@ -841,18 +1287,19 @@ def get_invoice_line_items_joined(
         {"$sort": {"invoice_date": -1}}
     ]
     
-    # Execute query
-    results = list(db.invoices.aggregate(pipeline))
+    columns = [
+        "invoice_id", "invoice_number", "invoice_date", "location", 
+        "vendor", "category", "item_name", "quantity", "unit", 
+        "unit_price", "line_total"
+    ]
     
-    # Convert to DataFrame
-    if not results:
-        return pd.DataFrame(columns=[
-            "invoice_id", "invoice_number", "invoice_date", "location", 
-            "vendor", "category", "item_name", "quantity", "unit", 
-            "unit_price", "line_total"
-        ])
+    # Execute query and build the frame straight from the cursor with a fixed
+    # schema, rather than materializing a list of dicts first
+    cursor = db.invoices.aggregate(pipeline, batchSize=5000, allowDiskUse=True)
+    df = pd.DataFrame.from_records(cursor, columns=columns)
     
-    df = pd.DataFrame(results)
+    if df.empty:
+        return df
     
     # Convert Decimal128 to float
     df['unit_price'] = df['unit_price'].apply(decimal128_to_float)
@@ -1019,7 +1466,8 @@ def get_spending_by_period(
 def get_category_breakdown(
     start_date: datetime.datetime,
     end_date: datetime.datetime,
-    restaurant_ids: Optional[List[ObjectId]] = None
+    restaurant_ids: Optional[List[ObjectId]] = None,
+    categories: Optional[List[str]] = None
 ) -> pd.DataFrame:
     """
     Get spending breakdown by category.
@@ -1028,6 +1476,7 @@ def get_category_breakdown(
         start_date: Start date for analysis
         end_date: End date for analysis
         restaurant_ids: Filter by restaurants (None = all)
+        categories: Filter line items by category (None = all)
     
     Returns:
         DataFrame with columns: category, total_spend, percentage
@@ -1048,14 +1497,7 @@ def get_category_breakdown(
         {"$match": match_filter},
         
         # Join with line_items
-        {
-            "$lookup": {
-                "from": "line_items",
-                "localField": "_id",
-                "foreignField": "invoice_id",
-                "as": "line_items"
-            }
-        },
+        {"$lookup": _line_items_lookup(categories)},
         
         {"$unwind": "$line_items"},
         
@@ -1096,15 +1538,22 @@ def get_category_breakdown(
 def get_vendor_spending(
     start_date: datetime.datetime,
     end_date: datetime.datetime,
-    restaurant_ids: Optional[List[ObjectId]] = None
+    restaurant_ids: Optional[List[ObjectId]] = None,
+    vendor_ids: Optional[List[ObjectId]] = None,
+    categories: Optional[List[str]] = None
 ) -> pd.DataFrame:
     """
     Get spending breakdown by vendor.
     
+    Spend is the sum of line item totals, so it matches the line-item based
+    analytics pages and respects the category filter.
+    
     Args:
         start_date: Start date for analysis
         end_date: End date for analysis
         restaurant_ids: Filter by restaurants (None = all)
+        vendor_ids: Filter by vendor IDs (None = all)
+        categories: Filter line items by category (None = all)
     
     Returns:
         DataFrame with columns: vendor, total_spend, invoice_count
@@ -1120,10 +1569,18 @@ def get_vendor_spending(
     if restaurant_ids:
         match_filter["restaurant_id"] = {"$in": restaurant_ids}
     
+    if vendor_ids:
+        match_filter["vendor_id"] = {"$in": vendor_ids}
+    
     # Aggregation pipeline
     pipeline = [
         {"$match": match_filter},
         
+        # Join with line_items
+        {"$lookup": _line_items_lookup(categories)},
+        
+        {"$unwind": "$line_items"},
+        
         # Join with vendors
         {
             "$lookup": {
@@ -1140,8 +1597,8 @@ def get_vendor_spending(
         {
             "$group": {
                 "_id": "$vendor_info.name",
-                "total_spend": {"$sum": "$invoice_total_amount"},
-                "invoice_count": {"$sum": 1}
+                "total_spend": {"$sum": "$line_items.line_total"},
+                "invoice_ids": {"$addToSet": "$_id"}
             }
         },
         
@@ -1151,7 +1608,7 @@ def get_vendor_spending(
             "$project": {
                 "vendor": "$_id",
                 "total_spend": 1,
-                "invoice_count": 1,
+                "invoice_count": {"$size": "$invoice_ids"},
                 "_id": 0
             }
         }
@@ -1168,11 +1625,99 @@ def get_vendor_spending(
     return df
 
 
+def get_invoice_counts_by_weekday(
+    start_date: datetime.datetime,
+    end_date: datetime.datetime,
+    restaurant_ids: Optional[List[ObjectId]] = None,
+    vendor_ids: Optional[List[ObjectId]] = None,
+    categories: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Count invoices per weekday of their invoice date.
+    
+    Only invoice headers are read, so this does not need the joined
+    line-item frame. When categories are given, only invoices with at least
+    one line item in those categories are counted.
+    
+    Args:
+        start_date: Start date for analysis
+        end_date: End date for analysis
+        restaurant_ids: Filter by restaurants (None = all)
+        vendor_ids: Filter by vendor IDs (None = all)
+        categories: Filter by line item category (None = all)
+    
+    Returns:
+        DataFrame with columns: weekday (MongoDB $dayOfWeek, 1 = Sunday), invoice_count
+    """
+    # Build match filter
+    match_filter = {
+        "invoice_date": {
+            "$gte": start_date,
+            "$lte": end_date.replace(hour=23, minute=59, second=59)
+        }
+    }
+    
+    if restaurant_ids:
+        match_filter["restaurant_id"] = {"$in": restaurant_ids}
+    
+    if vendor_ids:
+        match_filter["vendor_id"] = {"$in": vendor_ids}
+    
+    pipeline = [{"$match": match_filter}]
+    
+    if categories:
+        # One matching line item is enough to keep the invoice
+        pipeline += [
+            {
+                "$lookup": {
+                    "from": "line_items",
+                    "localField": "_id",
+                    "foreignField": "invoice_id",
+                    "pipeline": [
+                        {"$match": {"category": {"$in": list(categories)}}},
+                        {"$limit": 1},
+                        {"$project": {"_id": 1}}
+                    ],
+                    "as": "matched_items"
+                }
+            },
+            {"$match": {"matched_items.0": {"$exists": True}}},
+        ]
+    
+    pipeline += [
+        {
+            "$group": {
+                "_id": {"$dayOfWeek": "$invoice_date"},
+                "invoice_count": {"$sum": 1}
+            }
+        },
+        
+        {"$sort": {"_id": 1}},
+        
+        {
+            "$project": {
+                "weekday": "$_id",
+                "invoice_count": 1,
+                "_id": 0
+            }
+        }
+    ]
+    
+    results = list(db.invoices.aggregate(pipeline))
+    
+    if not results:
+        return pd.DataFrame(columns=["weekday", "invoice_count"])
+    
+    return pd.DataFrame(results)
+
+
 def get_top_items_by_spend(
     start_date: datetime.datetime,
     end_date: datetime.datetime,
     restaurant_ids: Optional[List[ObjectId]] = None,
-    limit: int = 20
+    limit: int = 20,
+    categories: Optional[List[str]] = None,
+    vendor_ids: Optional[List[ObjectId]] = None
 ) -> pd.DataFrame:
     """
     Get top items by total spending.
@@ -1182,6 +1727,8 @@ def get_top_items_by_spend(
         end_date: End date for analysis
         restaurant_ids: Filter by restaurants (None = all)
         limit: Number of top items to return
+        categories: Filter line items by category (None = all)
+        vendor_ids: Filter by vendor IDs (None = all)
     
     Returns:
         DataFrame with columns: item_name, category, total_spend, avg_price
@@ -1197,19 +1744,15 @@ def get_top_items_by_spend(
     if restaurant_ids:
         match_filter["restaurant_id"] = {"$in": restaurant_ids}
     
+    if vendor_ids:
+        match_filter["vendor_id"] = {"$in": vendor_ids}
+    
     # Aggregation pipeline
     pipeline = [
         {"$match": match_filter},
         
         # Join with line_items
-        {
-            "$lookup": {
-                "from": "line_items",
-                "localField": "_id",
-                "foreignField": "invoice_id",
-                "as": "line_items"
-            }
-        },
+        {"$lookup": _line_items_lookup(categories)},
         
         {"$unwind": "$line_items"},
         
@@ -13,6 +13,30 @@ load_dotenv(dotenv_path=env_path)
 URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
 DB_NAME = os.getenv("DB_NAME", "invoice_processing_db")
 
+# Connection pool sizing. Streamlit serves every session from one process, so
+# the pool is shared by all open pages.
+MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "50"))
+MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "5"))
+# Wire compression for large cursors (exports, joined line items). zlib needs no
+# extra package; use "zstd,zlib" once the zstandard package is installed.
+COMPRESSORS = os.getenv("MONGODB_COMPRESSORS", "zlib")
+
+# MongoClient is a thread-safe connection pool; share one per process
+_client = None
+
+def get_client():
+    """Return the process-wide MongoClient, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = MongoClient(
+            URI,
+            maxPoolSize=MAX_POOL_SIZE,
+            minPoolSize=MIN_POOL_SIZE,
+            compressors=COMPRESSORS,
+            retryWrites=True
+        )
+    return _client
+
 def start_connection(create_dummy=False):
     """
     Connects to MongoDB.
@@ -20,7 +44,7 @@ def start_connection(create_dummy=False):
     If create_dummy is True, it ensures a dummy restaurant exists and returns its ID.
     """
     try:
-        client = MongoClient(URI)
+        client = get_client()
         client.admin.command('ping') # Check connection
         
         existing_dbs = client.list_database_names()
@@ -265,15 +289,27 @@ def create_indexes(db):
 
     # Sorting index for UI
     db.invoices.create_index([("restaurant_id", ASCENDING), ("invoice_date", DESCENDING)])
+    # Date-range analytics queries with no restaurant filter
+    db.invoices.create_index([("invoice_date", DESCENDING)])
+    # Browse page: newest invoices for one vendor, and invoice number search
+    db.invoices.create_index([("vendor_id", ASCENDING), ("invoice_date", DESCENDING)])
+    db.invoices.create_index([("invoice_number", ASCENDING)])
 
     # 5. Line Items
     db.line_items.create_index([("invoice_id", ASCENDING)])
     db.line_items.create_index([("category", ASCENDING)])
+    # Category-filtered invoice joins (analytics pages)
+    db.line_items.create_index([("invoice_id", ASCENDING), ("category", ASCENDING)])
+    # Per-invoice line ordering (exports, next line number in add_line_item)
+    db.line_items.create_index([("invoice_id", ASCENDING), ("line_number", ASCENDING)])
 
     # 6. Item Lookup Map
     # _id is already indexed by default, but we might want to query by category
     db.item_lookup_map.create_index([("category", ASCENDING)])
 
+    # Category Management groups categories by type
+    db.categories.create_index([("type", ASCENDING)])
+
     # 7. Temp Uploads (Session Persistence)
     db.temp_uploads.create_index([("session_id", ASCENDING)], unique=True)
     # TTL index: auto-delete temp uploads after 7 days
@@ -289,9 +325,7 @@ if __name__ == "__main__":
         # When create_dummy=False, start_connection returns None, not a db object
         # Let's connect directly here
         try:
-            from pymongo import MongoClient
-            client = MongoClient(URI)
-            db = client[DB_NAME]
+            db = get_client()[DB_NAME]
             
             create_validation_rules(db)
             create_indexes(db)